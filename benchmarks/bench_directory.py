@@ -0,0 +1,127 @@
+"""Directory benchmark: cost per item of the all_shows listing, per-item vs batched
+
+"before" is the directory population as it was before the items were batched: one
+addDirectoryItem call per item, and one setArt call per art type (up to 4). "after" is the
+current one: the items are queued and added with a single addDirectoryItems call, with a single
+setArt call per item. Both resolve the artwork URLs the same way, so only the calls to Kodi
+differ. `--call-cost` charges each call to the Kodi stubs a fixed time, to model the crossing
+from Python to Kodi.
+
+    python benchmarks/bench_directory.py --shows 5000 --call-cost 0.000005
+"""
+
+import argparse
+import statistics
+import sys
+import time
+
+from harness import ADDON_URL, HANDLE, Harness
+from mock_api import Fixtures
+
+# The Kodi stubs are importable once the harness is
+import _bridge  # pylint: disable=wrong-import-order
+import xbmcgui  # pylint: disable=wrong-import-order
+import xbmcplugin  # pylint: disable=wrong-import-order
+
+
+def per_item_plugin_class():
+    """Returns the plugin class adding its directory items one by one"""
+    from resources.lib.plugin import Plugin  # pylint: disable=import-outside-toplevel
+
+    class PerItemPlugin(Plugin):
+        def _add_item_to_directory(
+            self,
+            name: str,
+            url: str,
+            label2: str = "",
+            icon_image: str = "",
+            thumbnail_image: str = "",
+            poster: dict = None,
+            fanart: dict = None,
+            video_info: dict = None,
+            properties: dict = None,
+            subtitles: dict = None,
+            is_folder: bool = False,
+        ):
+            liz = xbmcgui.ListItem(name, label2)
+            if properties:
+                liz.setProperties(properties)
+            if video_info:
+                liz.setInfo("video", video_info)
+            if poster:
+                liz.setArt({"poster": self.artwork.url("poster", poster)})
+            if fanart:
+                liz.setArt({"fanart": self.artwork.url("fanart", fanart)})
+            if thumbnail_image:
+                liz.setArt({"thumb": self.artwork.url("thumb", thumbnail_image)})
+            if icon_image:
+                liz.setArt({"icon": self.artwork.url("icon", icon_image)})
+            if subtitles:
+                liz.setSubtitles(subtitles)
+
+            xbmcplugin.addDirectoryItem(
+                self.HANDLE,
+                url,
+                listitem=liz,
+                isFolder=is_folder,
+            )
+
+        def _end_of_directory(self):
+            xbmcplugin.endOfDirectory(self.HANDLE)
+
+    return PerItemPlugin
+
+
+def measure(plugin_class, shows: list, repeat: int) -> tuple:
+    """Returns the median time and the number of Kodi calls to list the shows"""
+    times = []
+    for _ in range(repeat):
+        xbmcplugin.reset()
+        plugin = plugin_class()
+        _bridge.reset()
+        start = time.perf_counter()
+        plugin.tv_shows_menu(shows)
+        plugin._end_of_directory()  # pylint: disable=protected-access
+        times.append(time.perf_counter() - start)
+        assert len(xbmcplugin.directories[-1]["items"]) == len(shows)
+    return statistics.median(times), _bridge.calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--shows", type=int, default=5000, help="Number of listed shows")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per variant")
+    parser.add_argument(
+        "--call-cost",
+        type=float,
+        nargs="*",
+        default=[0.0, 0.000005, 0.00002],
+        help="Seconds charged per call to Kodi. Each value is measured",
+    )
+    args = parser.parse_args()
+
+    with Harness():
+        # pylint: disable=import-outside-toplevel
+        from resources.lib.plugin import Plugin
+
+        sys.argv = [ADDON_URL, str(HANDLE), "?bu=srf&mode=all_shows"]
+        shows = Fixtures(shows=args.shows).shows("srf")
+        variants = (("before", per_item_plugin_class()), ("after", Plugin))
+        print(
+            f"{args.shows} shows\n"
+            f"{'call cost us':>12} {'variant':<7} {'total ms':>9} {'us/item':>8}"
+            f" {'calls/item':>10}"
+        )
+        for call_cost in args.call_cost:
+            _bridge.CALL_COST = call_cost
+            for name, plugin_class in variants:
+                elapsed, calls = measure(plugin_class, shows, args.repeat)
+                print(
+                    f"{call_cost * 1e6:>12.1f} {name:<7} {elapsed * 1000:>9.1f}"
+                    f" {elapsed * 1e6 / len(shows):>8.2f} {calls / len(shows):>10.2f}"
+                )
+        _bridge.CALL_COST = 0.0
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Memory benchmark: decoding of the showList of a BU, raw vs compacted vs streamed
+
+- raw: the whole response is downloaded, then decoded with json.loads, like res.json(). The
+  whole decoded response is kept, as the plugin did before the responses were compacted.
+- compacted: same download and decoding, then the response is reduced to the used fields
+  (`_compact_response`). Only the compacted response is kept.
+- streamed: the shows are decoded while the response is downloaded and compacted one by one
+  (`_stream_items`), as the plugin does now for tv_shows/alphabetical.
+
+The peak and retained memory are measured with tracemalloc, and the time without it. The
+response is served from memory in chunks like requests' iter_content, so the network isn't
+measured.
+
+    python benchmarks/bench_memory.py --shows 2000
+    python benchmarks/bench_memory.py --fixture tv_shows_alphabetical.json  # Recorded showList
+"""
+
+import argparse
+import gc
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+
+# pylint: disable=protected-access
+from harness import ADDON_URL, HANDLE, Harness
+from mock_api import Fixtures
+
+CHUNK_SIZE = 64 * 1024
+
+
+def chunks(body: bytes):
+    """Yields the response body like requests' iter_content"""
+    for position in range(0, len(body), CHUNK_SIZE):
+        yield body[position : position + CHUNK_SIZE]
+
+
+def decode_raw(client, body: bytes) -> dict:
+    return json.loads(b"".join(chunks(body)))
+
+
+def decode_compacted(client, body: bytes) -> dict:
+    return client._compact_response(json.loads(b"".join(chunks(body))))
+
+
+def decode_streamed(client, body: bytes) -> dict:
+    # pylint: disable=import-outside-toplevel
+    from resources.lib.srgssr_api_client.json_stream import iter_array_items
+
+    return {
+        "showList": [
+            client._compact_item("showList", show)
+            for show in iter_array_items(chunks(body), "showList")
+        ]
+    }
+
+
+def measure(decode, client, body: bytes, repeat: int) -> dict:
+    """Returns the median decoding time, and the peak and retained memory of a decoding"""
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        data = decode(client, body)
+        times.append(time.perf_counter() - start)
+        del data
+
+    gc.collect()
+    tracemalloc.start()
+    data = decode(client, body)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "ms": statistics.median(times) * 1000,
+        "peak": peak,
+        "retained": retained,
+        "shows": len(data["showList"]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--shows", type=int, default=2000, help="Number of synthetic shows")
+    parser.add_argument("--fixture", default="", help="Recorded tv_shows/alphabetical response")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per variant")
+    args = parser.parse_args()
+
+    if args.fixture:
+        with open(args.fixture, "rb") as fixture_file:
+            body = fixture_file.read()
+    else:
+        body = json.dumps({"showList": Fixtures(shows=args.shows).shows("srf")}).encode()
+
+    with Harness():
+        # pylint: disable=import-outside-toplevel
+        from resources.lib.plugin import Plugin
+
+        sys.argv = [ADDON_URL, str(HANDLE), "?bu=srf&mode=all_shows"]
+        client = Plugin().video_client
+        print(
+            f"showList of {len(body) / 1024 / 1024:.1f} MiB\n"
+            f"{'variant':<10} {'shows':>6} {'decode ms':>10} {'peak MiB':>9} {'kept MiB':>9}"
+        )
+        for name, decode in (
+            ("raw", decode_raw),
+            ("compacted", decode_compacted),
+            ("streamed", decode_streamed),
+        ):
+            result = measure(decode, client, body, args.repeat)
+            print(
+                f"{name:<10} {result['shows']:>6} {result['ms']:>10.1f}"
+                f" {result['peak'] / 1024 / 1024:>9.2f} {result['retained'] / 1024 / 1024:>9.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
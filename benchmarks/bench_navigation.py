@@ -0,0 +1,83 @@
+"""Navigation benchmark: runs every Router.dispatch mode against the local API
+
+Each menu is opened with a cold cache (everything but the API tokens removed from the profile)
+and then again with the cache filled by the first run, like when navigating back. The time until
+the menu is handed to Kodi, the total run time (background tasks included), the number of items
+and the number of HTTP requests are reported.
+
+    python benchmarks/bench_navigation.py --latency 0.05
+"""
+
+import argparse
+import statistics
+
+from harness import Harness, item_query
+from mock_api import Fixtures
+
+
+def scenarios(harness: Harness) -> list:
+    """Returns the (name, query, dialog inputs) of the benchmarked navigations
+
+    The queries of the listings are taken from the menus leading to them, like Kodi does.
+    """
+    topic_id = harness.api.fixtures.item_id("srf", "topic", 0)
+
+    shows = harness.run("bu=srf&mode=all_shows").directory
+    episodes = harness.run(item_query(shows, 0)).directory
+    searched = harness.run("bu=srf&mode=search_videos&query=arena").directory
+    return [
+        ("bu_menu", "", ()),
+        ("main_menu", "bu=srf", ()),
+        ("all_shows", "bu=srf&mode=all_shows", ()),
+        ("shows_by_letters", "bu=srf&mode=shows_by_letters", ()),
+        ("shows_by_letters a", "bu=srf&mode=shows_by_letters&letter=a", ()),
+        ("videos_by_topic", "bu=srf&mode=videos_by_topic", ()),
+        ("list_videos_by_topic", f"bu=srf&mode=list_videos_by_topic&topic_id={topic_id}", ()),
+        ("search", "bu=srf&mode=search", ()),
+        ("search tv_shows", "bu=srf&mode=search&type=tv_shows", ("arena",)),
+        ("search tv_shows all", "bu=srf&mode=search&type=tv_shows&all_bus=true", ("arena",)),
+        ("search videos", "bu=srf&mode=search&type=videos", ("arena",)),
+        ("search videos all", "bu=srf&mode=search&type=videos&all_bus=true", ("arena",)),
+        ("search_videos p2", item_query(searched, -1), ()),
+        ("trending", "bu=srf&mode=trending", ()),
+        ("list_episodes_by_show", item_query(shows, 0), ()),
+        ("list_episodes p2", item_query(episodes, -1), ()),
+        ("jump_to_page 9", item_query(episodes, -2), ("9",)),
+        ("play_video", item_query(episodes, 0), ()),
+        ("purge_cache", "bu=srf&mode=purge_cache", ()),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--latency", type=float, default=0.03, help="API latency in seconds")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per menu and cache state")
+    parser.add_argument("--shows", type=int, default=400, help="Number of shows per BU")
+    parser.add_argument("--fixtures", default="", help="Folder of recorded API responses")
+    args = parser.parse_args()
+
+    fixtures = Fixtures(shows=args.shows, directory=args.fixtures)
+    with Harness(fixtures, args.latency) as harness:
+        print(
+            f"{'menu':<22} {'cold ms':>9} {'warm ms':>9} {'total ms':>9} {'items':>6}"
+            f" {'req cold':>8} {'req warm':>8}"
+        )
+        for name, query, inputs in scenarios(harness):
+            cold, warm = [], []
+            for _ in range(args.repeat):
+                harness.clear_cache()
+                cold.append(harness.run(query, inputs))
+                warm.append(harness.run(query, inputs))
+            directory = cold[-1].directory
+            print(
+                f"{name:<22}"
+                f" {statistics.median(run.menu_ms for run in cold):>9.1f}"
+                f" {statistics.median(run.menu_ms for run in warm):>9.1f}"
+                f" {statistics.median(run.total_ms for run in cold):>9.1f}"
+                f" {len(directory['items']) if directory else '-':>6}"
+                f" {cold[-1].requests:>8} {warm[-1].requests:>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
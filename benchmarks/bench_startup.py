@@ -0,0 +1,165 @@
+"""Startup benchmark: import and dispatch time of every Router.dispatch mode in a new interpreter
+
+Kodi starts a new interpreter for every navigation, so the import of the plugin is paid on every
+click. Each mode is run in its own process, with a warm cache, against the Kodi stubs and the
+local API. The times are checked against the budget of `startup_budget.json`, and the modes
+sending no request must not import requests, like all the modes but play_video must not import
+inputstreamhelper.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --update-budget  # After a justified regression
+"""
+
+import argparse
+import compileall
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BUDGET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "startup_budget.json")
+BUDGET_MARGIN = 2.0  # Budget written by --update-budget, relative to the measured times
+HEAVY_MODULES = ("requests", "inputstreamhelper")
+
+
+def child(query: str):
+    """Runs the plugin once and prints its timings, without importing anything else first"""
+    start = time.perf_counter()
+    benchmarks_path = os.path.dirname(os.path.abspath(__file__))
+    sys.path[:0] = [
+        os.path.join(os.path.dirname(benchmarks_path), "plugin.video.srgssr_ch_replay"),
+        os.path.join(benchmarks_path, "kodi_stubs"),
+    ]
+    import xbmcaddon  # pylint: disable=import-outside-toplevel
+    import xbmcgui  # pylint: disable=import-outside-toplevel
+
+    xbmcaddon.PROFILE = os.environ["BENCH_PROFILE"]
+    xbmcaddon.SETTINGS.update(json.loads(os.environ["BENCH_SETTINGS"]))
+    xbmcgui.DIALOG_INPUTS[:] = json.loads(os.environ["BENCH_INPUTS"])
+    sys.argv = ["plugin://plugin.video.srgssr_ch_replay/", "1", "?" + query]
+
+    imported = time.perf_counter()
+    from resources.lib.plugin import Plugin  # pylint: disable=import-outside-toplevel
+
+    Plugin.SRG_API_BASE_URL = os.environ["BENCH_API_URL"]
+    dispatched = time.perf_counter()
+    Plugin().run()
+    end = time.perf_counter()
+    print(
+        json.dumps(
+            {
+                "import_ms": (dispatched - imported) * 1000,
+                "dispatch_ms": (end - dispatched) * 1000,
+                "total_ms": (end - start) * 1000,
+                "modules": [name for name in HEAVY_MODULES if name in sys.modules],
+            }
+        )
+    )
+
+
+def measure(harness, query: str, inputs: tuple, repeat: int) -> dict:
+    """Returns the median timings of runs of the plugin in new interpreters"""
+    env = dict(
+        os.environ,
+        BENCH_PROFILE=harness.profile,
+        BENCH_SETTINGS=json.dumps(harness.settings),
+        BENCH_INPUTS=json.dumps(list(inputs)),
+        BENCH_API_URL=harness.api.base_url,
+    )
+    runs = []
+    for _ in range(repeat):
+        # Counting the interpreter startup too, as Kodi pays it on each click
+        start = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", query],
+            env=env,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        run = json.loads(output.splitlines()[-1])
+        run["process_ms"] = (time.perf_counter() - start) * 1000
+        runs.append(run)
+    result = {
+        key: statistics.median(run[key] for run in runs)
+        for key in ("import_ms", "dispatch_ms", "total_ms", "process_ms")
+    }
+    result["modules"] = runs[-1]["modules"]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--child", metavar="QUERY", help=argparse.SUPPRESS)
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per mode")
+    parser.add_argument("--latency", type=float, default=0.0, help="API latency in seconds")
+    parser.add_argument("--update-budget", action="store_true", help="Rewrite the budget file")
+    args = parser.parse_args()
+    if args.child is not None:
+        child(args.child)
+        return
+
+    # pylint: disable=import-outside-toplevel
+    from bench_navigation import scenarios
+    from harness import ADDON_PATH, STUBS_PATH, Harness
+
+    # Kodi keeps the bytecode of the add-ons: it's written even if PYTHONDONTWRITEBYTECODE is set,
+    # so the import isn't measured with the compilation
+    for path in (ADDON_PATH, STUBS_PATH):
+        compileall.compile_dir(path, quiet=1)
+
+    with open(BUDGET_PATH, encoding="utf-8") as budget_file:
+        budget = json.load(budget_file)
+
+    failures = []
+    results = {}
+    with Harness(latency=args.latency) as harness:
+        print(
+            f"{'menu':<22} {'import ms':>9} {'dispatch':>9} {'total ms':>9} {'process':>9}"
+            f" {'budget':>7}  heavy modules"
+        )
+        for name, query, inputs in scenarios(harness):
+            # Warming the cache, so only the requests the mode always sends are measured
+            harness.run(query, inputs)
+            requests = harness.run(query, inputs).requests
+            result = measure(harness, query, inputs, args.repeat)
+            results[name] = result
+            limit = budget["modes"].get(name)
+            print(
+                f"{name:<22} {result['import_ms']:>9.1f} {result['dispatch_ms']:>9.1f}"
+                f" {result['total_ms']:>9.1f} {result['process_ms']:>9.1f}"
+                f" {limit or '-':>7}  {', '.join(result['modules']) or '-'}"
+            )
+
+            if limit is not None and result["total_ms"] > limit:
+                failures.append(f"{name}: {result['total_ms']:.1f} ms > {limit} ms")
+            if result["import_ms"] > budget["import_ms"]:
+                failures.append(f"{name}: import {result['import_ms']:.1f} ms")
+            if "requests" in result["modules"] and not requests:
+                failures.append(f"{name}: requests imported without sending any request")
+            if "inputstreamhelper" in result["modules"] and name != "play_video":
+                failures.append(f"{name}: inputstreamhelper imported")
+
+    if args.update_budget:
+        budget = {
+            "import_ms": round(
+                max(result["import_ms"] for result in results.values()) * BUDGET_MARGIN, 1
+            ),
+            "modes": {
+                name: round(result["total_ms"] * BUDGET_MARGIN, 1)
+                for name, result in results.items()
+            },
+        }
+        with open(BUDGET_PATH, "w", encoding="utf-8") as budget_file:
+            json.dump(budget, budget_file, indent=2)
+            budget_file.write("\n")
+        print(f"Budget written to {BUDGET_PATH}")
+    elif failures:
+        print("Over budget:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Streaming benchmark: all_shows without cache, on a large catalog
+
+- list: the shows are listed once the whole response is received and decoded, as get_tv_shows
+  returns them.
+- generator: the shows are decoded while the response is downloaded (iter_tv_shows).
+
+The local API sends the response at a limited bandwidth, so the download takes a while as on a
+real network. The time until the directory is handed to Kodi and the peak memory (tracemalloc)
+are reported. Kodi only shows the directory once it's complete, so neither variant lists a show
+earlier: the generator saves memory and decodes the shows while the rest is received.
+
+    python benchmarks/bench_streaming.py --shows 10000 --bandwidth 4000000
+    python benchmarks/bench_streaming.py --fixtures recorded/  # tv_shows_alphabetical.json
+"""
+
+import argparse
+import tracemalloc
+
+from harness import Harness
+from mock_api import Fixtures
+
+
+def plugin_classes() -> tuple:
+    """Returns the plugin classes of the two variants"""
+    from resources.lib.plugin import Plugin  # pylint: disable=import-outside-toplevel
+
+    class ListPlugin(Plugin):
+        def all_tv_shows(self):
+            only_active_shows = not self.settings.show_inactive_shows
+            shows = self.video_client.get_tv_shows(self.bu, only_active_shows=only_active_shows)[
+                "showList"
+            ]
+            self.tv_shows_menu(shows)
+            self._end_of_directory()
+
+    return (("list", ListPlugin), ("generator", Plugin))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--shows", type=int, default=10000, help="Number of synthetic shows")
+    parser.add_argument("--fixtures", default="", help="Folder of recorded API responses")
+    parser.add_argument(
+        "--bandwidth", type=int, default=4_000_000, help="Bytes per second sent by the API"
+    )
+    parser.add_argument("--latency", type=float, default=0.05, help="API latency in seconds")
+    args = parser.parse_args()
+
+    fixtures = Fixtures(shows=args.shows, directory=args.fixtures)
+    with Harness(
+        fixtures, args.latency, {"enable_cache": "false"}, bandwidth=args.bandwidth
+    ) as harness:
+        variants = plugin_classes()
+        # Generating the response and getting the API token before measuring
+        harness.api.bandwidth = 0
+        harness.run("bu=srf&mode=all_shows")
+        harness.api.bandwidth = args.bandwidth
+
+        print(f"{'variant':<10} {'shows':>6} {'menu ms':>9} {'peak MiB':>9}")
+        for name, plugin_class in variants:
+            tracemalloc.start()
+            run = harness.run("bu=srf&mode=all_shows", plugin_class=plugin_class)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(
+                f"{name:<10} {len(run.directory['items']):>6}"
+                f" {run.menu_ms:>9.1f} {peak / 1024 / 1024:>9.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
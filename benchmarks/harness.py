@@ -0,0 +1,147 @@
+"""Runs the plugin outside Kodi, against the Kodi stubs and the local API
+
+Importing this module puts the add-on folder and the Kodi stubs on the import path. The plugin
+module is still plugin.py as shipped: it imports the Kodi modules at the top, which resolve to
+the stubs of `kodi_stubs`.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections import namedtuple
+from urllib.parse import urlparse
+
+BENCHMARKS_PATH = os.path.dirname(os.path.abspath(__file__))
+ADDON_PATH = os.path.join(os.path.dirname(BENCHMARKS_PATH), "plugin.video.srgssr_ch_replay")
+STUBS_PATH = os.path.join(BENCHMARKS_PATH, "kodi_stubs")
+for _path in (ADDON_PATH, STUBS_PATH):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+# pylint: disable=wrong-import-position
+import _bridge
+import xbmc
+import xbmcaddon
+import xbmcgui
+import xbmcplugin
+
+from mock_api import Fixtures, MockApi
+
+ADDON_URL = "plugin://plugin.video.srgssr_ch_replay/"
+HANDLE = 1
+
+# A plugin run: wall time until the menu was handed to Kodi (endOfDirectory or
+# setResolvedUrl) and until the end of the run (background tasks included), the built
+# directory (None if the run resolved a URL or built nothing), the HTTP requests sent and the
+# calls to the Kodi stubs
+Run = namedtuple("Run", ["menu_ms", "total_ms", "directory", "requests", "kodi_calls"])
+
+
+class Harness:
+    """Plugin runner with its own profile folder and API server"""
+
+    SETTINGS = {
+        "consumerKey": "benchmark-key",
+        "consumerSecret": "benchmark-secret",
+        "consumerKeySubtitles": "benchmark-key",
+        "consumerSecretSubtitles": "benchmark-secret",
+    }
+
+    def __init__(
+        self,
+        fixtures: Fixtures = None,
+        latency: float = 0.0,
+        settings: dict = None,
+        bandwidth: int = 0,
+    ):
+        """
+        :param fixtures: The catalog served by the local API
+        :param latency: Seconds the local API waits before answering each request
+        :param settings: Add-on settings overriding the defaults of resources/settings.xml
+        :param bandwidth: Bytes per second the local API sends its responses at (0: unlimited)
+        """
+        self.api = MockApi(fixtures, latency, bandwidth=bandwidth)
+        self.settings = dict(self.SETTINGS, **(settings or {}))
+        self.profile = tempfile.mkdtemp(prefix="srgssr_benchmark_")
+
+    def __enter__(self):
+        # pylint: disable=import-outside-toplevel
+        from resources.lib.plugin import Plugin
+
+        self.api.__enter__()
+        Plugin.SRG_API_BASE_URL = self.api.base_url
+        xbmcaddon.PROFILE = self.profile
+        xbmcaddon.SETTINGS.clear()
+        xbmcaddon.SETTINGS.update(self.settings)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.api.__exit__(*exc_info)
+        shutil.rmtree(self.profile, ignore_errors=True)
+
+    def set_settings(self, **settings):
+        xbmcaddon.SETTINGS.update(settings)
+
+    def clear_cache(self):
+        """Deletes everything the plugin stored in its profile but the API tokens"""
+        for name in os.listdir(self.profile):
+            path = os.path.join(self.profile, name)
+            if name.startswith("token_"):
+                continue
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+
+    def run(self, query: str, inputs: tuple = (), plugin_class=None) -> Run:
+        """Runs the plugin like Kodi does when a menu is opened
+        :param query: The query of the plugin URL (with or without the leading "?")
+        :param inputs: Values typed in the dialogs asking for input (search string, page number)
+        :param plugin_class: The class of the run plugin. Plugin if not given
+        """
+        if plugin_class is None:
+            from resources.lib.plugin import Plugin  # pylint: disable=import-outside-toplevel
+
+            plugin_class = Plugin
+        xbmcplugin.reset()
+        xbmcgui.DIALOG_INPUTS[:] = inputs
+        _bridge.reset()
+        self.api.reset_counts()
+        sys.argv = [ADDON_URL, str(HANDLE), "?" + query.lstrip("?")]
+
+        start = time.perf_counter()
+        plugin_class().run()
+        end = time.perf_counter()
+
+        directory = xbmcplugin.directories[-1] if xbmcplugin.directories else None
+        if directory is not None:
+            menu_end = directory["ended_at"]
+        elif xbmcplugin.resolved:
+            menu_end = xbmcplugin.resolved[-1][2]
+        else:
+            menu_end = end
+        errors = [message for level, message in xbmc.messages if level >= xbmc.LOGERROR]
+        xbmc.messages.clear()
+        if errors:
+            raise RuntimeError(f"The plugin logged errors running {query}: {errors}")
+        return Run(
+            (menu_end - start) * 1000,
+            (end - start) * 1000,
+            directory,
+            self.api.number_of_requests,
+            _bridge.calls,
+        )
+
+
+def item_query(directory: dict, position: int = 0, label: str = None) -> str:
+    """Returns the query of the plugin URL of an item of a directory
+    :param directory: The directory built by a run
+    :param position: The position of the item, if no label is given
+    :param label: The start of the label of the item
+    """
+    items = directory["items"]
+    if label is not None:
+        items = [item for item in items if item[1].label.startswith(label)]
+    return urlparse(items[position][0]).query
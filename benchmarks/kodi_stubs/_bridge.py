@@ -0,0 +1,21 @@
+"""Accounting of the calls from the plugin to the Kodi stubs"""
+
+import time
+
+CALL_COST = 0.0  # Seconds spent in each call, to model the Python -> Kodi crossing
+calls = 0  # Number of calls to the stubs since the last reset
+
+
+def cross():
+    """Counts a call to Kodi"""
+    global calls  # pylint: disable=global-statement
+    calls += 1
+    if CALL_COST:
+        end = time.perf_counter() + CALL_COST
+        while time.perf_counter() < end:
+            pass
+
+
+def reset():
+    global calls  # pylint: disable=global-statement
+    calls = 0
@@ -0,0 +1,12 @@
+"""Stub of the InputStream Helper module, for running the plugin outside Kodi"""
+
+
+class Helper:
+    inputstream_addon = "inputstream.adaptive"
+
+    def __init__(self, protocol: str, drm: str = None):
+        self.protocol = protocol
+        self.drm = drm
+
+    def check_inputstream(self) -> bool:
+        return True
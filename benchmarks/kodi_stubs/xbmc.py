@@ -0,0 +1,64 @@
+"""Stub of the Kodi xbmc module, for running the plugin outside Kodi"""
+
+import json
+
+LOGDEBUG = 0
+LOGINFO = 1
+LOGWARNING = 2
+LOGERROR = 3
+LOGFATAL = 4
+
+LOG_LEVEL = LOGWARNING  # Messages below this level are dropped
+DEBUG_LOGGING = False  # Value of the "System.GetBool(debug.showloginfo)" condition
+JSONRPC_RESPONSES = {}  # JSON-RPC method -> result returned by executeJSONRPC
+messages = []  # (level, message) of the logged messages
+
+
+def log(msg: str, level: int = LOGDEBUG):
+    if level >= LOG_LEVEL:
+        messages.append((level, msg))
+
+
+def getCondVisibility(condition: str) -> bool:
+    return condition == "System.GetBool(debug.showloginfo)" and DEBUG_LOGGING
+
+
+def getGlobalIdleTime() -> int:
+    return 3600
+
+
+def executeJSONRPC(request: str) -> str:
+    request = json.loads(request)
+    result = JSONRPC_RESPONSES.get(request["method"], {})
+    return json.dumps({"jsonrpc": "2.0", "id": request.get("id"), "result": result})
+
+
+class Monitor:
+    def abortRequested(self) -> bool:
+        return False
+
+    def waitForAbort(self, timeout: float = 0) -> bool:
+        return True
+
+
+class Player:
+    playing_file = ""  # Path of the played file. Nothing is played if empty
+    total_time = 0.0
+    time = 0.0
+
+    def isPlaying(self) -> bool:
+        return bool(self.playing_file)
+
+    def isPlayingVideo(self) -> bool:
+        return bool(self.playing_file)
+
+    def getPlayingFile(self) -> str:
+        if not self.playing_file:
+            raise RuntimeError("Kodi is not playing any media file")
+        return self.playing_file
+
+    def getTotalTime(self) -> float:
+        return self.total_time
+
+    def getTime(self) -> float:
+        return self.time
@@ -0,0 +1,73 @@
+"""Stub of the Kodi xbmcaddon module, reading the add-on's own settings and strings files"""
+
+import os
+import re
+import tempfile
+import xml.etree.ElementTree as ET
+
+from _bridge import cross
+
+ADDON_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "plugin.video.srgssr_ch_replay",
+)
+PROFILE = os.path.join(tempfile.gettempdir(), "srgssr_ch_replay_profile")  # Userdata folder
+SETTINGS = {}  # Setting ID -> value, overriding the defaults of resources/settings.xml
+
+_defaults = None
+_strings = None
+
+
+def _load_defaults() -> dict:
+    tree = ET.parse(os.path.join(ADDON_PATH, "resources", "settings.xml"))
+    return {
+        setting.get("id"): (setting.findtext("default") or "")
+        for setting in tree.iter("setting")
+        if setting.get("id")
+    }
+
+
+def _load_strings() -> dict:
+    strings_path = os.path.join(
+        ADDON_PATH, "resources", "language", "resource.language.en_gb", "strings.po"
+    )
+    with open(strings_path, encoding="utf-8") as strings_file:
+        content = strings_file.read()
+    return {
+        int(string_id): text
+        for string_id, text in re.findall(r'msgctxt "#(\d+)"\s*\nmsgid "(.*)"', content)
+    }
+
+
+class Addon:
+    def __init__(self, id: str = None):  # pylint: disable=redefined-builtin
+        global _defaults, _strings  # pylint: disable=global-statement
+        cross()
+        if _defaults is None:
+            _defaults = _load_defaults()
+            _strings = _load_strings()
+
+    def getSetting(self, id: str) -> str:  # pylint: disable=redefined-builtin
+        cross()
+        return str(SETTINGS.get(id, _defaults.get(id, "")))
+
+    def setSetting(self, id: str, value: str):  # pylint: disable=redefined-builtin
+        cross()
+        SETTINGS[id] = value
+
+    def getAddonInfo(self, id: str) -> str:  # pylint: disable=redefined-builtin
+        cross()
+        return {
+            "id": "plugin.video.srgssr_ch_replay",
+            "name": "Unofficial SRG SSR Replay",
+            "path": ADDON_PATH,
+            "profile": PROFILE,
+            "icon": os.path.join(ADDON_PATH, "resources", "icon.png"),
+        }.get(id, "")
+
+    def getLocalizedString(self, id: int) -> str:  # pylint: disable=redefined-builtin
+        cross()
+        return _strings.get(id, "")
+
+    def openSettings(self):
+        cross()
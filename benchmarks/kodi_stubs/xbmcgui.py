@@ -0,0 +1,114 @@
+"""Stub of the Kodi xbmcgui module, for running the plugin outside Kodi"""
+
+from _bridge import cross
+
+SCREEN_WIDTH = 1920
+NOTIFICATION_INFO = "info"
+NOTIFICATION_WARNING = "warning"
+NOTIFICATION_ERROR = "error"
+DIALOG_INPUTS = []  # Values returned by the next Dialog.input and Dialog.numeric calls
+notifications = []  # (heading, message) of the notifications and OK dialogs shown
+_window_properties = {}  # window ID -> {key: value}
+
+
+def getScreenWidth() -> int:
+    cross()
+    return SCREEN_WIDTH
+
+
+class ListItem:
+    """List item keeping what the plugin set on it"""
+
+    def __init__(self, label: str = "", label2: str = "", path: str = "", offscreen: bool = False):
+        cross()
+        self.label = label
+        self.label2 = label2
+        self.path = path
+        self.art = {}
+        self.info = {}
+        self.properties = {}
+        self.subtitles = []
+        self.mime_type = ""
+        self.content_lookup = True
+
+    def getLabel(self) -> str:
+        cross()
+        return self.label
+
+    def setArt(self, values: dict):
+        cross()
+        self.art.update(values)
+
+    def setInfo(self, type: str, infoLabels: dict):  # pylint: disable=redefined-builtin
+        cross()
+        self.info.setdefault(type, {}).update(infoLabels)
+
+    def setProperty(self, key: str, value: str):
+        cross()
+        self.properties[key.lower()] = value
+
+    def setProperties(self, dictionary: dict):
+        cross()
+        self.properties.update({key.lower(): value for key, value in dictionary.items()})
+
+    def getProperty(self, key: str) -> str:
+        cross()
+        return self.properties.get(key.lower(), "")
+
+    def setSubtitles(self, subtitleFiles: list):
+        cross()
+        self.subtitles = list(subtitleFiles)
+
+    def setMimeType(self, mimetype: str):
+        cross()
+        self.mime_type = mimetype
+
+    def setContentLookup(self, enable: bool):
+        cross()
+        self.content_lookup = enable
+
+    def setPath(self, path: str):
+        cross()
+        self.path = path
+
+    def __repr__(self):
+        return f"ListItem({self.label!r})"
+
+
+class Dialog:
+    """Dialogs answering with the values queued in DIALOG_INPUTS (empty when none is queued)"""
+
+    def input(self, heading: str, defaultt: str = "", type: int = 0, **kwargs) -> str:
+        cross()
+        return DIALOG_INPUTS.pop(0) if DIALOG_INPUTS else ""
+
+    def numeric(self, type: int, heading: str, defaultt: str = "", **kwargs) -> str:
+        cross()
+        return DIALOG_INPUTS.pop(0) if DIALOG_INPUTS else ""
+
+    def ok(self, heading: str, message: str) -> bool:
+        cross()
+        notifications.append((heading, message))
+        return True
+
+    def notification(self, heading: str, message: str, icon: str = "", time: int = 5000, **kwargs):
+        cross()
+        notifications.append((heading, message))
+
+
+class Window:
+    def __init__(self, existingWindowId: int = -1):
+        cross()
+        self._properties = _window_properties.setdefault(existingWindowId, {})
+
+    def setProperty(self, key: str, value: str):
+        cross()
+        self._properties[key.lower()] = value
+
+    def getProperty(self, key: str) -> str:
+        cross()
+        return self._properties.get(key.lower(), "")
+
+    def clearProperty(self, key: str):
+        cross()
+        self._properties.pop(key.lower(), None)
@@ -0,0 +1,54 @@
+"""Stub of the Kodi xbmcplugin module, recording the directories built by the plugin"""
+
+import time
+
+from _bridge import cross
+
+# The directories ended by the plugin: items, content, category, succeeded and ended_at (the
+# time.perf_counter() of the endOfDirectory call)
+directories = []
+resolved = []  # (succeeded, ListItem, time.perf_counter()) of the URLs resolved by the plugin
+_pending = {}  # handle -> directory being built
+
+
+def reset():
+    """Forgets the recorded directories"""
+    directories.clear()
+    resolved.clear()
+    _pending.clear()
+
+
+def _directory(handle: int) -> dict:
+    cross()
+    return _pending.setdefault(handle, {"items": [], "content": "", "category": ""})
+
+
+def addDirectoryItem(handle: int, url: str, listitem, isFolder: bool = False, totalItems: int = 0):
+    _directory(handle)["items"].append((url, listitem, isFolder))
+    return True
+
+
+def addDirectoryItems(handle: int, items: list, totalItems: int = 0):
+    _directory(handle)["items"].extend(items)
+    return True
+
+
+def setContent(handle: int, content: str):
+    _directory(handle)["content"] = content
+
+
+def setPluginCategory(handle: int, category: str):
+    _directory(handle)["category"] = category
+
+
+def endOfDirectory(
+    handle: int, succeeded: bool = True, updateListing: bool = False, cacheToDisc: bool = True
+):
+    directory = _directory(handle)
+    directory.update(succeeded=succeeded, ended_at=time.perf_counter())
+    directories.append(_pending.pop(handle))
+
+
+def setResolvedUrl(handle: int, succeeded: bool, listitem):
+    cross()
+    resolved.append((succeeded, listitem, time.perf_counter()))
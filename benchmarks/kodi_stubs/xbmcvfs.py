@@ -0,0 +1,6 @@
+"""Stub of the Kodi xbmcvfs module, for running the plugin outside Kodi"""
+
+
+def translatePath(path: str) -> str:
+    # The stub addon returns real paths already
+    return path
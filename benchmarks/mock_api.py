@@ -0,0 +1,413 @@
+"""Local stand-in for api.srgssr.ch, serving synthetic or recorded responses
+
+The synthetic responses are generated deterministically and shaped like the SRF ones (same keys,
+similar sizes), so the plugin parses and caches them as it does in production. Recorded
+responses can replace them: a file named after the API path, without the videometadata/v2/
+prefix and with the slashes replaced by underscores (e.g. `tv_shows_alphabetical.json`), is
+served instead of the synthetic response.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+WORDS = (
+    "Arena", "Boulevard", "Club", "Dok", "Einstein", "Fokus", "Gesichter", "Horizonte", "Impact",
+    "Justice", "Kassensturz", "Luna", "Meteo", "Netz Natur", "Ohne Filter", "Puls", "Quer",
+    "Rundschau", "Sternstunde", "Tagesschau", "Unser Dorf", "Virus", "Wissen", "Xenia", "Yoga",
+    "Zambo", "10 vor 10", "1 gegen 100",
+)  # fmt: skip
+
+
+class Fixtures:
+    """Deterministic catalog of a BU, generated on demand"""
+
+    def __init__(
+        self,
+        shows: int = 400,
+        episodes_per_show: int = 120,
+        topics: int = 20,
+        medias_per_topic: int = 300,
+        trending: int = 40,
+        search_results: int = 150,
+        directory: str = "",
+    ):
+        """
+        :param shows: Number of TV Shows of each BU
+        :param episodes_per_show: Number of episodes of each show
+        :param topics: Number of topics of each BU
+        :param medias_per_topic: Number of videos of each topic
+        :param trending: Number of trending videos
+        :param search_results: Number of videos matching a search
+        :param directory: Folder of recorded responses, served instead of the synthetic ones
+        """
+        self.number_of_shows = shows
+        self.episodes_per_show = episodes_per_show
+        self.number_of_topics = topics
+        self.medias_per_topic = medias_per_topic
+        self.number_of_trending = trending
+        self.number_of_search_results = search_results
+        self.directory = directory
+        self._show_indexes = {}  # bu -> {show ID: index}
+
+    def recorded(self, path: str) -> bytes:
+        """Returns the recorded response of a path, or None"""
+        if not self.directory:
+            return None
+        name = path.strip("/")
+        if name.startswith("videometadata/v2/"):
+            name = name[len("videometadata/v2/") :]
+        file_path = os.path.join(self.directory, name.replace("/", "_") + ".json")
+        if not os.path.isfile(file_path):
+            return None
+        with open(file_path, "rb") as recorded_file:
+            return recorded_file.read()
+
+    @staticmethod
+    def item_id(*parts) -> str:
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, "/".join(str(part) for part in parts)))
+
+    @staticmethod
+    def image_url(*parts) -> str:
+        return f"https://ws.srf.ch/asset/image/audio/{Fixtures.item_id('image', *parts)}"
+
+    def show(self, bu: str, index: int) -> dict:
+        """Returns a show shaped like the SRF shows of the tv_shows responses"""
+        show_id = self.item_id(bu, "show", index)
+        title = f"{WORDS[index % len(WORDS)]} {index // len(WORDS) or ''}".strip()
+        image_url = self.image_url(bu, "show", index)
+        return {
+            "id": show_id,
+            "vendor": bu.upper(),
+            "transmission": "TV",
+            "urn": f"urn:{bu}:show:tv:{show_id}",
+            "title": title,
+            "lead": f"Lead of {title}. " * 3,
+            "description": f"Description of the show {title}, broadcast every week. " * 6,
+            "imageUrl": image_url,
+            "imageTitle": title,
+            "bannerImageUrl": image_url,
+            "posterImageUrl": f"{image_url}/poster",
+            "posterImageIsFallbackUrl": index % 3 == 0,
+            "primaryChannelId": self.item_id(bu, "channel", index % 3),
+            "primaryChannelUrn": f"urn:{bu}:channel:tv:{self.item_id(bu, 'channel', index % 3)}",
+            "availableAudioLanguageList": [{"locale": "de", "language": "Deutsch"}],
+            "availableVideoQualityList": ["SD", "HD"],
+            "audioDescriptionAvailable": index % 5 == 0,
+            "subtitlesAvailable": index % 2 == 0,
+            "multiAudioLanguagesAvailable": False,
+            "topicList": [
+                {
+                    "id": self.item_id(bu, "topic", index % max(self.number_of_topics, 1)),
+                    "vendor": bu.upper(),
+                    "transmission": "TV",
+                    "urn": f"urn:{bu}:topic:tv:{index % max(self.number_of_topics, 1)}",
+                    "title": f"Topic {index % max(self.number_of_topics, 1)}",
+                }
+            ],
+            "allowIndexing": True,
+            "numberOfEpisodes": self.episodes_per_show,
+            "playableAbroad": index % 4 != 0,
+        }
+
+    def shows(self, bu: str, character_filter: str = "", string_filter: str = "") -> list:
+        shows = (self.show(bu, index) for index in range(self.number_of_shows))
+        if character_filter == "#":
+            return [show for show in shows if not show["title"][0].isalpha()]
+        if character_filter:
+            return [show for show in shows if show["title"][0].lower() == character_filter]
+        if string_filter:
+            return [show for show in shows if string_filter.lower() in show["title"].lower()]
+        return list(shows)
+
+    def media(self, bu: str, key: str, index: int, show_index: int = None) -> dict:
+        """Returns a video with its show and episode"""
+        if show_index is None:
+            show_index = index % max(self.number_of_shows, 1)
+        show = self.show(bu, show_index)
+        media_id = self.item_id(bu, "media", key, index)
+        episode_id = self.item_id(bu, "episode", key, index)
+        published = time.strftime(
+            "%Y-%m-%dT%H:%M:%S+02:00", time.gmtime(1_700_000_000 - index * 86400)
+        )
+        return {
+            "id": media_id,
+            "mediaType": "VIDEO",
+            "vendor": bu.upper(),
+            "urn": f"urn:{bu}:video:{media_id}",
+            "title": f"{show['title']} vom {published[:10]}",
+            "description": f"The episode {index} of {show['title']}. " * 4,
+            "imageUrl": self.image_url(bu, "media", key, index),
+            "imageTitle": show["title"],
+            "type": "EPISODE",
+            "date": published,
+            "duration": 1_800_000 + index * 1000,
+            "playableAbroad": True,
+            "displayable": True,
+            "position": 0,
+            "noEmbed": False,
+            "show": {key: show[key] for key in ("id", "vendor", "urn", "title", "imageUrl")},
+            "episode": {
+                "id": episode_id,
+                "title": f"{show['title']} vom {published[:10]}",
+                "publishedDate": published,
+                "imageUrl": self.image_url(bu, "media", key, index),
+            },
+        }
+
+    def episode(self, bu: str, show_index: int, index: int) -> dict:
+        media = self.media(bu, f"show{show_index}", index, show_index)
+        return dict(media.pop("episode"), mediaList=[media])
+
+    def show_index(self, bu: str, show_id: str) -> int:
+        """Returns the index of a show from its ID, or None if the BU has no such show"""
+        if bu not in self._show_indexes:
+            self._show_indexes[bu] = {
+                self.item_id(bu, "show", index): index for index in range(self.number_of_shows)
+            }
+        return self._show_indexes[bu].get(show_id)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keeps the connections alive, like the real API
+    CHUNK_SIZE = 16 * 1024  # Bytes sent at once when the bandwidth is limited
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+    def do_POST(self):
+        self.server.api.count(self.path)
+        self.server.api.wait()
+        if urlparse(self.path).path == "/oauth/v1/accesstoken":
+            self._send_json({"access_token": uuid.uuid4().hex, "expires_in": 2592000})
+        else:
+            self._send(404, b"{}")
+
+    def do_GET(self):
+        api = self.server.api
+        api.count(self.path)
+        api.wait()
+        url = urlparse(self.path)
+        if not self.headers.get("Authorization", "").startswith("Bearer "):
+            self._send(401, b'{"error": "missing token"}')
+            return
+        body = api.response(url.path, dict(parse_qsl(url.query)))
+        if body is None:
+            self._send(404, b"{}")
+            return
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        if self.headers.get("If-None-Match") == etag:
+            self._send(304, b"", etag)
+        else:
+            self._send(200, body, etag)
+
+    def _send_json(self, data: dict):
+        self._send(200, json.dumps(data).encode())
+
+    def _send(self, status: int, body: bytes, etag: str = ""):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        bandwidth = self.server.api.bandwidth
+        if not bandwidth:
+            self.wfile.write(body)
+            return
+        for position in range(0, len(body), self.CHUNK_SIZE):
+            chunk = body[position : position + self.CHUNK_SIZE]
+            self.wfile.write(chunk)
+            self.wfile.flush()
+            time.sleep(len(chunk) / bandwidth)
+
+
+class MockApi:
+    """HTTP server answering like the SRG SSR APIs, run in a background thread"""
+
+    DEFAULT_PAGE_SIZE = 10
+
+    def __init__(
+        self,
+        fixtures: Fixtures = None,
+        latency: float = 0.0,
+        page_cap: int = 100,
+        bandwidth: int = 0,
+    ):
+        """
+        :param fixtures: The served catalog. The default one if not given
+        :param latency: Seconds waited before answering each request, to model the network
+        :param page_cap: Maximal number of items returned per page, whatever the pageSize
+        :param bandwidth: Bytes per second the responses are sent at. Unlimited if 0
+        """
+        self.fixtures = fixtures or Fixtures()
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.page_cap = page_cap
+        self.requests = {}  # path -> number of requests
+        self._lock = threading.Lock()
+        self._bodies = {}  # Encoded responses of the large listings
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.api = self
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+    @property
+    def number_of_requests(self) -> int:
+        return sum(self.requests.values())
+
+    def reset_counts(self):
+        with self._lock:
+            self.requests.clear()
+
+    def count(self, path: str):
+        with self._lock:
+            path = urlparse(path).path
+            self.requests[path] = self.requests.get(path, 0) + 1
+
+    def wait(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def response(self, path: str, params: dict) -> bytes:
+        """Returns the encoded response of a request, or None if the path is unknown"""
+        recorded = self.fixtures.recorded(path)
+        if recorded is not None:
+            return recorded
+
+        if path.startswith("/srgssr-play-subtitles/v1/identifier/"):
+            return self._subtitles(path.rsplit("/", 1)[1])
+        prefix = "/videometadata/v2/"
+        if not path.startswith(prefix):
+            return None
+        endpoint = path[len(prefix) :]
+        bu = params.get("bu", "srf")
+        fixtures = self.fixtures
+
+        if endpoint == "tv_shows/alphabetical":
+            key = (bu, params.get("characterFilter", ""))
+            if key not in self._bodies:
+                shows = fixtures.shows(bu, character_filter=params.get("characterFilter", ""))
+                self._bodies[key] = json.dumps({"showList": shows}).encode()
+            return self._bodies[key]
+        if endpoint == "tv_shows":
+            shows = fixtures.shows(bu, string_filter=params.get("q", ""))
+            return json.dumps({"searchResultListShow": shows}).encode()
+        if endpoint == "tv_topics":
+            topics = [
+                {
+                    "id": fixtures.item_id(bu, "topic", index),
+                    "vendor": bu.upper(),
+                    "urn": f"urn:{bu}:topic:tv:{index}",
+                    "title": f"Topic {index}",
+                    "imageUrl": fixtures.image_url(bu, "topic", index),
+                }
+                for index in range(fixtures.number_of_topics)
+            ]
+            return json.dumps({"topicList": topics}).encode()
+        if endpoint.startswith("latest_episodes/shows/"):
+            show_index = fixtures.show_index(bu, endpoint.rsplit("/", 1)[1])
+            if show_index is None:
+                return None
+            data, start, stop = self._page(path, params, fixtures.episodes_per_show)
+            data["show"] = fixtures.show(bu, show_index)
+            data["episodeList"] = [
+                fixtures.episode(bu, show_index, index) for index in range(start, stop)
+            ]
+            return json.dumps(data).encode()
+        if endpoint.startswith("latest_topics/"):
+            topic_id = endpoint.rsplit("/", 1)[1]
+            data, start, stop = self._page(path, params, fixtures.medias_per_topic)
+            data["mediaList"] = [
+                fixtures.media(bu, f"topic{topic_id}", index) for index in range(start, stop)
+            ]
+            return json.dumps(data).encode()
+        if endpoint == "trending_picks":
+            data, start, stop = self._page(path, params, fixtures.number_of_trending)
+            data["mediaList"] = [
+                fixtures.media(bu, "trending", index) for index in range(start, stop)
+            ]
+            return json.dumps(data).encode()
+        if endpoint == "search":
+            data, start, stop = self._page(path, params, fixtures.number_of_search_results)
+            data["searchResultListMedia"] = [
+                fixtures.media(bu, f"search{params.get('q', '')}", index)
+                for index in range(start, stop)
+            ]
+            return json.dumps(data).encode()
+        if endpoint.endswith("/mediaComposition"):
+            return self._media_composition(bu, endpoint.split("/", 1)[0])
+        return None
+
+    def _page(self, path: str, params: dict, number_of_items: int) -> tuple:
+        """Returns the paging part of a list response and the range of its items"""
+        if params.get("next"):
+            start, page_size = (int(value) for value in params["next"].split("-"))
+        else:
+            start, page_size = 0, int(params.get("pageSize", self.DEFAULT_PAGE_SIZE))
+        page_size = min(page_size, self.page_cap)
+        stop = min(start + page_size, number_of_items)
+        data = {}
+        if stop < number_of_items:
+            query = urlencode({"bu": params.get("bu", "srf"), "next": f"{stop}-{page_size}"})
+            data["next"] = f"{self.base_url}{path}?{query}"
+        return data, start, stop
+
+    @staticmethod
+    def _media_composition(bu: str, media_id: str) -> bytes:
+        base_url = f"https://srgssrch.akamaized.net/hls/{bu}/{media_id}"
+        return json.dumps(
+            {
+                "chapterUrn": f"urn:{bu}:video:{media_id}",
+                "chapterList": [
+                    {
+                        "id": media_id,
+                        "mediaType": "VIDEO",
+                        "resourceList": [
+                            {
+                                "url": f"{base_url}/sd/master.m3u8",
+                                "quality": "SD",
+                                "protocol": "HLS",
+                                "mimeType": "application/x-mpegURL",
+                            },
+                            {
+                                "url": f"{base_url}/hd/master.m3u8",
+                                "quality": "HD",
+                                "protocol": "HLS",
+                                "mimeType": "application/x-mpegURL",
+                            },
+                        ],
+                    }
+                ],
+            }
+        ).encode()
+
+    @staticmethod
+    def _subtitles(urn: str) -> bytes:
+        return json.dumps(
+            {
+                "data": {
+                    "assets": [
+                        {"hasSubtitling": [{"identifier": f"https://subtitles.example/{urn}.vtt"}]}
+                    ]
+                }
+            }
+        ).encode()
@@ -0,0 +1,54 @@
+"""Size of the images of the listings"""
+
+from urllib.parse import urlparse
+
+
+class ArtworkPolicy:
+    """Rewrites the SRG SSR image URLs to images scaled for their use
+
+    The SRG SSR image services return an image scaled to a width when "/scale/width/<width>" is
+    appended to its URL. A thumbnail is only a fraction of the screen, while a fanart fills it.
+    """
+
+    # Widths offered by the image services. Using a few widths keeps the URLs, and so Kodi's
+    # texture cache entries, the same from a listing to the other
+    WIDTHS = (240, 320, 480, 640, 960, 1280, 1920)
+    # Fraction of the screen width used by each art type
+    SCREEN_FRACTIONS = {"thumb": 0.25, "poster": 0.25, "fanart": 1}
+    # Domains of the image services able to scale the images
+    SCALING_DOMAINS = ("srf.ch", "rts.ch", "rsi.ch", "rtr.ch", "swissinfo.ch", "srgssr.ch")
+
+    def __init__(self, screen_width: int, enabled: bool = True):
+        """
+        :param screen_width: Width in pixels of the Kodi window
+        :param enabled: If false, the URLs are kept as they are
+        """
+        self._screen_width = screen_width
+        self.enabled = enabled
+
+    def width(self, art_type: str) -> int:
+        """Returns the width of the images of an art type"""
+        target = self._screen_width * self.SCREEN_FRACTIONS.get(art_type, 1)
+        return next((width for width in self.WIDTHS if width >= target), self.WIDTHS[-1])
+
+    def url(self, art_type: str, image_url: str) -> str:
+        """Returns the URL of the image scaled for the art type, if the image can be scaled
+        :param art_type: The Kodi art type (thumb, poster, fanart...)
+        :param image_url: The image URL given by the API
+        """
+        if not self.enabled or art_type not in self.SCREEN_FRACTIONS or not image_url:
+            return image_url
+
+        parsed_url = urlparse(image_url)
+        domain = parsed_url.netloc.lower()
+        if (
+            parsed_url.scheme not in ("http", "https")
+            or parsed_url.query
+            or "/scale/" in parsed_url.path
+            or not any(
+                domain == scaling_domain or domain.endswith("." + scaling_domain)
+                for scaling_domain in self.SCALING_DOMAINS
+            )
+        ):
+            return image_url
+        return f"{image_url.rstrip('/')}/scale/width/{self.width(art_type)}"
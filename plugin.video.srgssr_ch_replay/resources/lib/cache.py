@@ -0,0 +1,136 @@
+"""Persistent cache of the API responses"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+class Cache:
+    """JSON cache stored in the addon profile folder
+
+    Each entry is stored in its own file named after the hash of its key. The modification
+    time of the file is updated on every hit and used for the LRU eviction.
+    """
+
+    _EXTENSION = ".json"
+
+    def __init__(self, folder: str, max_size: int, logger, enabled: bool = True):
+        """
+        :param folder: The cache folder. Created if it doesn't exist
+        :param max_size: Maximal size of the cache in bytes. Least recently used entries are evicted
+        :param logger: The plugin logger
+        :param enabled: If false, nothing is read from or written to the cache
+        """
+        self._folder = folder
+        self._max_size = max_size
+        self._logger = logger
+        self.enabled = enabled
+        if not os.path.isdir(self._folder):
+            os.mkdir(self._folder)
+
+    @staticmethod
+    def key(*parts) -> str:
+        """Builds a cache key from the given parts"""
+        raw = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._folder, key + self._EXTENSION)
+
+    def get(self, key: str):
+        """Returns the cached data or None if missing or expired
+        :param key: The cache key (see `Cache.key`)
+        """
+        entry = self._read(key)
+        if entry is None or entry.get("expires", 0) < time.time():
+            return None
+        return entry.get("data")
+
+    def get_stale(self, key: str):
+        """Returns the cached data even if expired, or None if missing
+        :param key: The cache key (see `Cache.key`)
+        """
+        entry = self._read(key)
+        if entry is None:
+            return None
+        return entry.get("data")
+
+    def _read(self, key: str):
+        """Reads a cache entry and marks it as recently used"""
+        if not self.enabled:
+            return None
+
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as cache_file:
+                entry = json.load(cache_file)
+        except (OSError, ValueError):
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass  # Evicted by another process or thread meanwhile
+        return entry
+
+    def set(self, key: str, data, ttl: int):
+        """Stores data in the cache
+        :param key: The cache key (see `Cache.key`)
+        :param data: JSON serializable data
+        :param ttl: Number of seconds the data stays valid
+        """
+        if not self.enabled:
+            return
+
+        entry = {"expires": time.time() + ttl, "data": data}
+        # Unique per writer, as processes and threads may store the same key at once
+        tmp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as cache_file:
+                json.dump(entry, cache_file)
+            os.replace(tmp_path, self._path(key))
+        except OSError as exc:
+            self._logger.warning("Unable to write cache entry %s: %s", key, exc)
+            return
+
+        self._evict()
+
+    def purge(self):
+        """Deletes all the cache entries"""
+        for entry in os.scandir(self._folder):
+            if entry.is_file():
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+        self._logger.info("Cache purged")
+
+    def _evict(self):
+        """Removes the least recently used entries while the cache is bigger than its max size"""
+        entries = []
+        for entry in os.scandir(self._folder):
+            if not entry.name.endswith(self._EXTENSION):
+                continue
+            # Other processes and threads evict the same folder: the entry may be gone already
+            try:
+                if entry.is_file():
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+            except OSError:
+                continue
+        total_size = sum(size for _, size, _ in entries)
+        if total_size <= self._max_size:
+            return
+
+        entries.sort()
+        for _, size, path in entries:
+            if total_size <= self._max_size:
+                break
+            try:
+                os.remove(path)
+                total_size -= size
+            except OSError:
+                pass
+        self._logger.debug("Cache evicted down to %s bytes", total_size)
@@ -0,0 +1,262 @@
+"""Local catalog of the TV Shows of a Business Unit"""
+
+import json
+from bisect import bisect_left, insort
+import os
+import re
+import time
+import unicodedata
+
+
+def normalize(text: str) -> str:
+    """Lower case text without accents, used to compare titles and search strings"""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+
+def tokenize(text: str) -> list:
+    """Splits a text in normalized words"""
+    return re.findall(r"\w+", normalize(text))
+
+
+class ShowCatalog:
+    """TV Shows list of a Business Unit persisted in the addon profile folder
+
+    The catalog is built from the complete alphabetical list of the API. It keeps an index of
+    the shows by first letter, and a sorted list of the words of their titles to search them
+    locally by prefix. Both are stored with the shows, and updated with the shows which changed
+    only.
+
+    The refresh state (update time and HTTP validators) is stored in a small separate file, so
+    a refresh finding no change doesn't rewrite the shows.
+    """
+
+    OTHER_CHARACTERS = "#"  # Letter of the shows not starting with a letter
+    MAX_AGE = 6 * 3600  # Number of seconds after which the catalog is refreshed
+    FORMAT = 2  # Version of the catalog file format. Catalogs of another format are rebuilt
+
+    def __init__(self, path: str, logger):
+        """
+        :param path: Path of the JSON file storing the catalog
+        :param logger: The plugin logger
+        """
+        self._path = path
+        self._state_path = os.path.splitext(path)[0] + ".state.json"
+        self._logger = logger
+        self.updated = 0
+        self.validators = {}  # ETag and Last-Modified of the shows list, if the API sent them
+        self.version = 0  # Incremented on each change of the shows
+        self.shows = []
+        self._shows_by_id = {}
+        self._positions = {}  # Show ID -> position in shows
+        self._letters = {}  # Letter -> IDs of the shows, in the catalog order
+        self._tokens = []  # Sorted words of the titles
+        self._token_ids = {}  # Word of _tokens -> IDs of the shows having it in their title
+        self._load()
+
+    def _load(self):
+        data = self._read(self._path)
+        if data is None or data.get("format") != self.FORMAT:
+            return
+        state = self._read(self._state_path) or {}
+
+        self.updated = state.get("updated", 0)
+        self.validators = state.get("validators", {})
+        self.version = data.get("version", 0)
+        self.shows = data.get("shows", [])
+        self._letters = data.get("letters", {})
+        self._tokens = [token for token, _ in data.get("tokens", [])]
+        self._token_ids = dict(data.get("tokens", []))
+        self._shows_by_id = {show.get("id"): show for show in self.shows}
+        self._positions = {show.get("id"): position for position, show in enumerate(self.shows)}
+
+    @staticmethod
+    def purge(folder: str, logger):
+        """Deletes all the catalogs of a folder"""
+        if not os.path.isdir(folder):
+            return
+        for entry in os.scandir(folder):
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+        logger.info("Show catalogs purged")
+
+    @staticmethod
+    def _read(path: str):
+        try:
+            with open(path, encoding="utf-8") as json_file:
+                return json.load(json_file)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, path: str, data: dict):
+        folder = os.path.dirname(path)
+        if not os.path.isdir(folder):
+            os.mkdir(folder)
+
+        tmp_path = path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as json_file:
+                json.dump(data, json_file)
+            os.replace(tmp_path, path)
+        except OSError as exc:
+            self._logger.warning("Unable to save the catalog %s: %s", path, exc)
+
+    def _save(self):
+        data = {
+            "format": self.FORMAT,
+            "version": self.version,
+            "shows": self.shows,
+            "letters": self._letters,
+            "tokens": [[token, self._token_ids[token]] for token in self._tokens],
+        }
+        self._write(self._path, data)
+        self._save_state()
+
+    def _save_state(self):
+        self._write(self._state_path, {"updated": self.updated, "validators": self.validators})
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.updated
+
+    @property
+    def is_outdated(self) -> bool:
+        return self.updated + self.MAX_AGE < time.time()
+
+    @classmethod
+    def first_letter(cls, show: dict) -> str:
+        """Returns the index letter of a show"""
+        title = normalize(show.get("title", "")).strip()
+        if title and "a" <= title[0] <= "z":
+            return title[0]
+        return cls.OTHER_CHARACTERS
+
+    def touch(self, validators: dict = None):
+        """Marks the catalog as up to date, e.g. when the API answered the shows didn't change
+        :param validators: The new HTTP validators of the shows list
+        """
+        self.updated = time.time()
+        if validators is not None:
+            self.validators = validators
+        self._save_state()
+        self._logger.debug("Catalog %s unchanged", self._path)
+
+    def update(self, shows: list, validators: dict = None):
+        """Applies the changes of the shows list to the catalog and saves it
+
+        The added, removed and changed shows are found in a single pass over the list. Only them
+        are updated in the indexes, and only the update time is saved if nothing changed.
+        :param shows: The TV Shows list returned by the API
+        :param validators: The HTTP validators of the shows list
+        """
+        positions = {}
+        added = []
+        changed = []  # (known show, new show)
+        for position, show in enumerate(shows):
+            show_id = show.get("id")
+            positions[show_id] = position
+            known_show = self._shows_by_id.get(show_id)
+            if known_show is None:
+                added.append(show)
+            elif known_show != show:
+                changed.append((known_show, show))
+        removed = [
+            show for show_id, show in self._shows_by_id.items() if show_id not in positions
+        ]
+        # Without additions nor removals, the shows only moved if their order changed
+        moved = not added and not removed and list(positions) != list(self._positions)
+        if not added and not removed and not changed and not moved:
+            self.touch(validators)
+            return
+
+        touched_letters = set()
+        for show in removed:
+            touched_letters.add(self._unindex(show))
+            del self._shows_by_id[show.get("id")]
+        for known_show, show in changed:
+            self._shows_by_id[show.get("id")] = show
+            if known_show.get("title") != show.get("title"):
+                touched_letters.add(self._unindex(known_show))
+                touched_letters.add(self._index(show))
+        for show in added:
+            self._shows_by_id[show.get("id")] = show
+            touched_letters.add(self._index(show))
+
+        if added or removed or moved:
+            self.shows = shows
+            self._positions = positions
+            touched_letters = self._letters.keys() if moved else touched_letters
+        else:
+            for _, show in changed:
+                self.shows[self._positions[show.get("id")]] = show
+        # The shows of a letter are kept in the catalog order
+        for letter in touched_letters:
+            self._letters[letter].sort(key=self._positions.__getitem__)
+
+        self.version += 1
+        self.updated = time.time()
+        if validators is not None:
+            self.validators = validators
+        self._save()
+        self._logger.debug(
+            "Catalog %s version %s: %s new, %s removed, %s updated shows",
+            self._path,
+            self.version,
+            len(added),
+            len(removed),
+            len(changed),
+        )
+
+    def _index(self, show: dict) -> str:
+        """Adds a show to the letters and words indexes, and returns its letter"""
+        show_id = show.get("id")
+        letter = self.first_letter(show)
+        self._letters.setdefault(letter, []).append(show_id)
+        for token in set(tokenize(show.get("title", ""))):
+            if token not in self._token_ids:
+                insort(self._tokens, token)
+                self._token_ids[token] = []
+            self._token_ids[token].append(show_id)
+        return letter
+
+    def _unindex(self, show: dict) -> str:
+        """Removes a show from the letters and words indexes, and returns its letter"""
+        show_id = show.get("id")
+        letter = self.first_letter(show)
+        self._letters[letter].remove(show_id)
+        for token in set(tokenize(show.get("title", ""))):
+            token_ids = self._token_ids[token]
+            token_ids.remove(show_id)
+            if not token_ids:
+                del self._token_ids[token]
+                del self._tokens[bisect_left(self._tokens, token)]
+        return letter
+
+    def by_letter(self, letter: str) -> list:
+        """Returns the shows whose title starts with the letter (or '#')"""
+        return [self._shows_by_id[show_id] for show_id in self._letters.get(letter.lower(), [])]
+
+    def _ids_matching(self, prefix: str) -> set:
+        """Returns the IDs of the shows having a title word starting with prefix"""
+        show_ids = set()
+        index = bisect_left(self._tokens, prefix)
+        while index < len(self._tokens) and self._tokens[index].startswith(prefix):
+            show_ids.update(self._token_ids[self._tokens[index]])
+            index += 1
+        return show_ids
+
+    def search(self, search_string: str) -> list:
+        """Returns the shows whose title has a word starting with each word of the search string
+
+        The shows are returned in the catalog (alphabetical) order.
+        """
+        matches = None
+        for part in tokenize(search_string):
+            show_ids = self._ids_matching(part)
+            matches = show_ids if matches is None else matches & show_ids
+            if not matches:
+                return []
+        ordered = sorted(matches or (), key=self._positions.__getitem__)
+        return [self._shows_by_id[show_id] for show_id in ordered]
@@ -0,0 +1,69 @@
+"""Circuit breaker protecting the plugin against a failing API"""
+
+import json
+import os
+import threading
+import time
+
+
+class CircuitBreaker:
+    """Stops calling an endpoint for a cool-down period after consecutive failures
+
+    The state is persisted in the addon profile folder as every navigation runs in a new
+    plugin process.
+    """
+
+    def __init__(self, state_file: str, logger, failure_threshold: int = 3, cooldown: int = 60):
+        """
+        :param state_file: Path of the JSON file storing the state of the endpoints
+        :param logger: The plugin logger
+        :param failure_threshold: Number of consecutive failures opening the circuit
+        :param cooldown: Number of seconds the circuit stays open
+        """
+        self._state_file = state_file
+        self._logger = logger
+        self._failure_threshold = failure_threshold
+        self._cooldown = cooldown
+        self._state = None
+        self._lock = threading.Lock()  # The API clients may be used from several threads
+
+    @property
+    def state(self) -> dict:
+        if self._state is None:
+            try:
+                with open(self._state_file, encoding="utf-8") as state_file:
+                    self._state = json.load(state_file)
+            except (OSError, ValueError):
+                self._state = {}
+        return self._state
+
+    def _save(self):
+        # Replaced at once: the API client threads and other plugin processes read the state
+        tmp_path = f"{self._state_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as state_file:
+                json.dump(self.state, state_file)
+            os.replace(tmp_path, self._state_file)
+        except OSError as exc:
+            self._logger.warning("Unable to save the circuit breaker state: %s", exc)
+
+    def is_open(self, endpoint: str) -> bool:
+        """Returns true if the endpoint must not be called"""
+        return self.state.get(endpoint, {}).get("open_until", 0) > time.time()
+
+    def record_success(self, endpoint: str):
+        """Closes the circuit of the endpoint"""
+        with self._lock:
+            if endpoint in self.state:
+                del self.state[endpoint]
+                self._save()
+
+    def record_failure(self, endpoint: str):
+        """Counts a failure and opens the circuit if the threshold is reached"""
+        with self._lock:
+            endpoint_state = self.state.setdefault(endpoint, {"failures": 0, "open_until": 0})
+            endpoint_state["failures"] += 1
+            if endpoint_state["failures"] >= self._failure_threshold:
+                endpoint_state["open_until"] = time.time() + self._cooldown
+                self._logger.warning("Circuit opened for %s during %ss", endpoint, self._cooldown)
+            self._save()
@@ -0,0 +1,72 @@
+"""Index of the cursors of the paged listings"""
+
+import json
+import os
+import threading
+
+
+class CursorIndex:
+    """Persisted mapping of the positions of a listing to their API cursor (next_page_id)
+
+    The API pages can only be walked forward with an opaque cursor. Knowing the cursors of
+    the visited chunks, by the position of their first item, allows to open any page directly.
+    """
+
+    def __init__(self, path: str, logger, max_listings: int = 200):
+        """
+        :param path: Path of the JSON file storing the index
+        :param logger: The plugin logger
+        :param max_listings: Number of listings kept. The least recently updated are dropped
+        """
+        self._path = path
+        self._logger = logger
+        self._max_listings = max_listings
+        self._listings = None
+
+    @property
+    def listings(self) -> dict:
+        if self._listings is None:
+            try:
+                with open(self._path, encoding="utf-8") as index_file:
+                    self._listings = json.load(index_file)
+            except (OSError, ValueError):
+                self._listings = {}
+        return self._listings
+
+    def _save(self):
+        # A plugin process reading the index while it's written must not get a truncated file
+        tmp_path = f"{self._path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as index_file:
+                json.dump(self.listings, index_file)
+            os.replace(tmp_path, self._path)
+        except OSError as exc:
+            self._logger.warning("Unable to save the cursor index: %s", exc)
+
+    def set(self, listing: str, position: int, cursor: str):
+        """Stores the cursor of the chunk of a listing starting at a position"""
+        cursors = self.listings.pop(listing, {})
+        if cursors.get(str(position)) == cursor:
+            self.listings[listing] = cursors
+            return
+
+        cursors[str(position)] = cursor
+        self.listings[listing] = cursors
+        while len(self.listings) > self._max_listings:
+            del self.listings[next(iter(self.listings))]
+        self._save()
+
+    def closest(self, listing: str, position: int) -> tuple:
+        """Returns (position, cursor) of the known chunk of a listing the closest before position
+
+        The first chunk, at position 0 and without cursor, is returned if no other is known.
+        """
+        known_positions = [
+            int(known_position)
+            for known_position in self.listings.get(listing, {})
+            if int(known_position) <= position
+        ]
+        if not known_positions:
+            return 0, ""
+        closest_position = max(known_positions)
+        return closest_position, self.listings[listing][str(closest_position)]
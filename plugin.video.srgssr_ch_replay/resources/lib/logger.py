@@ -2,25 +2,41 @@ import xbmc
 
 
 class Logger:
-    """Wrapper of the XBMC Logger"""
+    """Wrapper of the XBMC Logger
+
+    Messages can be given with %-style arguments, which are only formatted if the message is
+    logged (e.g. debug messages while debug logging is disabled cost nothing).
+    """
     def __init__(self, plugin):
         self.plugin = plugin
-
-    def _log(self, message, level):
+        self._debug_enabled = None
+
+    @property
+    def debug_enabled(self) -> bool:
+        if self._debug_enabled is None:
+            self._debug_enabled = bool(
+                xbmc.getCondVisibility("System.GetBool(debug.showloginfo)")
+            )
+        return self._debug_enabled
+
+    def _log(self, message, level, args):
+        if args:
+            message = str(message) % args
         fmt_message = f"[{self.plugin.ADDON_ID}]: {str(message)}"
         xbmc.log(fmt_message, level=level)
 
-    def debug(self, message):
-        self._log(message, xbmc.LOGDEBUG)
+    def debug(self, message, *args):
+        if self.debug_enabled:
+            self._log(message, xbmc.LOGDEBUG, args)
 
-    def info(self, message):
-        self._log(message, xbmc.LOGINFO)
+    def info(self, message, *args):
+        self._log(message, xbmc.LOGINFO, args)
 
-    def warning(self, message):
-        self._log(message, xbmc.LOGWARNING)
+    def warning(self, message, *args):
+        self._log(message, xbmc.LOGWARNING, args)
 
-    def error(self, message):
-        self._log(message, xbmc.LOGERROR)
+    def error(self, message, *args):
+        self._log(message, xbmc.LOGERROR, args)
 
-    def fatal(self, message):
-        self._log(message, xbmc.LOGFATAL)
+    def fatal(self, message, *args):
+        self._log(message, xbmc.LOGFATAL, args)
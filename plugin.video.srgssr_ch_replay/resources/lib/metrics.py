@@ -0,0 +1,81 @@
+"""Performance instrumentation of a plugin invocation"""
+
+import json
+import os
+import time
+from contextlib import contextmanager
+
+
+class Metrics:
+    """Collects timed spans (routing, HTTP calls, decoding, directory building...)
+
+    At the end of the invocation a one line summary is logged and, if a metrics file is given,
+    all the spans are appended to it as a JSON line.
+    """
+
+    def __init__(self, logger, metrics_file: str = "", max_file_size: int = 1024 * 1024):
+        """
+        :param logger: The plugin logger
+        :param metrics_file: Path of the JSONL metrics file. No file is written if empty
+        :param max_file_size: Size in bytes above which the metrics file is rotated
+        """
+        self._logger = logger
+        self._metrics_file = metrics_file
+        self._max_file_size = max_file_size
+        self._start = time.perf_counter()
+        self.spans = []
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Times the enclosed block. The yielded dict can be completed with attributes"""
+        start = time.perf_counter()
+        try:
+            yield attributes
+        finally:
+            self.record(name, time.perf_counter() - start, **attributes)
+
+    def timed(self, name: str, func, *args, **kwargs):
+        """Calls func in a span and returns its result"""
+        with self.span(name):
+            return func(*args, **kwargs)
+
+    def record(self, name: str, duration: float, **attributes):
+        """Adds a span measured by the caller"""
+        self.spans.append(dict(attributes, name=name, duration=round(duration, 4)))
+
+    def summary(self) -> str:
+        """One line summary of the invocation"""
+        total = time.perf_counter() - self._start
+        durations = {}
+        for span in self.spans:
+            count, duration = durations.get(span["name"], (0, 0))
+            durations[span["name"]] = (count + 1, duration + span["duration"])
+
+        cache_spans = [span for span in self.spans if span["name"] == "cache"]
+        hits = sum(1 for span in cache_spans if span.get("hit"))
+        parts = [f"total {total:.3f}s"]
+        parts += [f"{name} {count}x {spent:.3f}s" for name, (count, spent) in durations.items()]
+        # The streamed responses are measured while decoded, not by their http span
+        parts.append(f"{sum(span.get('bytes', 0) for span in self.spans)} bytes")
+        parts.append(f"cache {hits} hit / {len(cache_spans) - hits} miss")
+        return ", ".join(parts)
+
+    def finish(self, **attributes):
+        """Logs the summary and appends the spans to the metrics file
+        :param attributes: Attributes of the invocation (e.g. mode) added to the metrics file
+        """
+        self._logger.debug("Timings: %s", self.summary())
+        if not self._metrics_file:
+            return
+
+        entry = dict(attributes, time=time.time(), spans=self.spans)
+        try:
+            if (
+                os.path.isfile(self._metrics_file)
+                and os.path.getsize(self._metrics_file) > self._max_file_size
+            ):
+                os.replace(self._metrics_file, self._metrics_file + ".1")
+            with open(self._metrics_file, "a", encoding="utf-8") as metrics_file:
+                metrics_file.write(json.dumps(entry) + "\n")
+        except OSError as exc:
+            self._logger.warning("Unable to write the metrics: %s", exc)
@@ -1,26 +1,34 @@
 import sys
 import os
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 from string import ascii_lowercase
 from collections import namedtuple
-from typing import Tuple
 from urllib.parse import parse_qsl, quote_plus, urlparse
-import requests
 
-import xbmc
 import xbmcaddon
 import xbmcgui
 import xbmcplugin
-import xbmcvfs
-import inputstreamhelper
 
-from resources.lib.utils import to_bool
 from resources.lib.settings import Settings
 from resources.lib.router import Router
 from resources.lib.logger import Logger
+from resources.lib.cache import Cache
+from resources.lib.circuit_breaker import CircuitBreaker
+from resources.lib.catalog import ShowCatalog
+from resources.lib.metrics import Metrics
+from resources.lib.cursor_index import CursorIndex
+from resources.lib.quota import QuotaLedger
+from resources.lib.artwork import ArtworkPolicy
 from resources.lib.srgssr_api_client import (
     SRGSSRVideoApiClient,
     SRGSSRSubtitlesApiClient,
+    SRGSSRApiException,
     InvalidCredentialsException,
+    CircuitOpenException,
+    QuotaExceededException,
 )
 
 
@@ -30,55 +38,103 @@ MainMenuItem = namedtuple("MainMenuItem", ["name", "url", "icon"])
 class Plugin:
     """Plugin's main class"""
 
-    KODI_VERSION_MAJOR = int(xbmc.getInfoLabel("System.BuildVersion").split(".", maxsplit=1)[0])
-    ADDON = xbmcaddon.Addon()
-    ADDON_ID = ADDON.getAddonInfo("id")
-    ADDON_URL = f"plugin://{ADDON_ID}"
-    HANDLE = int(sys.argv[1])
     SRG_API_BASE_URL = "https://api.srgssr.ch"
+    MAX_API_PAGE_SIZE = 100  # Maximal number of items the API returns per page
+    BUSINESS_UNITS = ("srf", "swi", "rts", "rsi", "rtr")
+    STREAM_CACHE_TTL = 5 * 60  # Maximal number of seconds a resolved stream is reused
+    STREAM_TOKEN_MARGIN = 60  # A stream is not reused if its token expires within these seconds
+    SUBTITLES_CACHE_TTL = 24 * 3600
+    NO_SUBTITLES_CACHE_TTL = 3 * 3600  # Shorter, as subtitles are often added after the broadcast
+    HOME_WINDOW_ID = 10000  # Kodi window whose properties are shared with the service
+    CATALOGS_FOLDER = "catalogs"  # Folder of the TV Shows catalogs in the profile folder
 
-    settings = Settings()
-
-    def __init__(self):
+    def __init__(self, handle: int = None):
+        """
+        :param handle: The plugin handle. Taken from the command line if not given (e.g. -1 when
+                       used from the service)
+        """
+        # Kodi objects are looked up here and not on import: every navigation is a new interpreter
+        self.ADDON = xbmcaddon.Addon()
+        self.settings = Settings(self.ADDON)
+        self.ADDON_ID = self.ADDON.getAddonInfo("id")
+        self.ADDON_URL = f"plugin://{self.ADDON_ID}"
+        self.HANDLE = int(sys.argv[1]) if handle is None else handle
         self.tr = self.ADDON.getLocalizedString
         self.icon = self.ADDON.getAddonInfo("icon")
         self.path = self.ADDON.getAddonInfo("path")
         self.logger = Logger(self)
         self.router = Router(self)
-        xbmcplugin.setContent(self.HANDLE, "tv_shows")
-        self._create_work_folder()
+        if self.HANDLE >= 0:
+            xbmcplugin.setContent(self.HANDLE, "tv_shows")
+        self.profile_path = self._create_work_folder()
+        self.metrics = Metrics(
+            self.logger,
+            os.path.join(self.profile_path, "metrics.jsonl")
+            if self.settings.enable_metrics_file
+            else "",
+        )
+        self.cache = Cache(
+            os.path.join(self.profile_path, "cache"),
+            self.settings.cache_size * 1024 * 1024,
+            self.logger,
+            enabled=self.settings.enable_cache,
+        )
+        self.circuit_breaker = CircuitBreaker(
+            os.path.join(self.profile_path, "circuit_breaker.json"),
+            self.logger,
+            cooldown=self.settings.circuit_breaker_cooldown,
+        )
+        self.quota = QuotaLedger(
+            os.path.join(self.profile_path, "quota.json"),
+            self.logger,
+            self.settings.daily_request_quota,
+        )
+        self.stale_while_revalidate = self.settings.stale_while_revalidate
+        self.timeout = (self.settings.connect_timeout, self.settings.read_timeout)
+        self.cursor_index = CursorIndex(
+            os.path.join(self.profile_path, "cursors.json"), self.logger
+        )
+        self.artwork = ArtworkPolicy(xbmcgui.getScreenWidth(), self.settings.scale_artwork)
+        self._background_tasks = []
+        self._directory_items = []
 
         # check if default BU is set in the settings
         self.bu = self.settings.default_bu if self.settings.default_bu != "choose" else ""
 
-        try:
-            self.video_client, self.subs_client = self._create_api_clients()
-        except InvalidCredentialsException as exc:
-            xbmcgui.Dialog().ok(self.tr(30096).format(exc.api_name), self.tr(30097))
-            sys.exit(1)
+        # API clients are created on first use, so menus without API calls don't need them
+        self._video_client = None
+        self._subs_client = None
+
+    def _create_work_folder(self) -> str:
+        """Creating the addon work folder if it doesn't exist and returning its path"""
+        import xbmcvfs  # pylint: disable=import-outside-toplevel
 
-    def _create_work_folder(self):
-        """Creating the addon work folder if it doesn't exist"""
         userdata_path = xbmcvfs.translatePath(self.ADDON.getAddonInfo("profile"))
         if not os.path.isdir(userdata_path):
             os.mkdir(userdata_path)
+        return userdata_path
 
-    def _create_api_clients(self) -> Tuple[SRGSSRVideoApiClient, SRGSSRSubtitlesApiClient]:
-        """Creates and returns the Video and Subtitles API clients"""
-        self._check_api_credentials_set("consumerKey", "consumerSecret")
-        video_client = SRGSSRVideoApiClient(
-            self.SRG_API_BASE_URL,
-            {
-                "key": self.settings.consumerKey,
-                "secret": self.settings.consumerSecret,
-            },
-            self,
-        )
+    @property
+    def video_client(self) -> SRGSSRVideoApiClient:
+        """The Video API client, created on first use"""
+        if self._video_client is None:
+            self._check_api_credentials_set("consumerKey", "consumerSecret")
+            self._video_client = SRGSSRVideoApiClient(
+                self.SRG_API_BASE_URL,
+                {
+                    "key": self.settings.consumerKey,
+                    "secret": self.settings.consumerSecret,
+                },
+                self,
+            )
+        return self._video_client
 
-        subs_client = None
-        if to_bool(self.settings.enable_subtitles):
+    @property
+    def subs_client(self) -> SRGSSRSubtitlesApiClient:
+        """The Subtitles API client, created on first use"""
+        if self._subs_client is None:
             self._check_api_credentials_set("consumerKeySubtitles", "consumerSecretSubtitles")
-            subs_client = SRGSSRSubtitlesApiClient(
+            self._subs_client = SRGSSRSubtitlesApiClient(
                 self.SRG_API_BASE_URL,
                 {
                     "key": self.settings.consumerKeySubtitles,
@@ -86,8 +142,7 @@ class Plugin:
                 },
                 self,
             )
-
-        return (video_client, subs_client)
+        return self._subs_client
 
     def _check_api_credentials_set(self, key_setting: str, secret_setting: str):
         """Checks that Video or Subtitles API credentials are set, and open the settings if not"""
@@ -97,6 +152,7 @@ class Plugin:
         ):
             xbmcgui.Dialog().ok(self.tr(30099), self.tr(30098))
             self.ADDON.openSettings()
+            self.settings.reload()
 
     def _bu_menu_items(self):
         """The BU menu items"""
@@ -142,19 +198,76 @@ class Plugin:
         """Plugin main method"""
         self.logger.debug("Starting SRGSSR plugin")
         self.logger.debug(
-            f"Argv[0]: {sys.argv[0]} ; Argv[1]: {sys.argv[1]} ; Argv[2]: {sys.argv[2]} ; "
+            "Argv[0]: %s ; Argv[1]: %s ; Argv[2]: %s ; ", sys.argv[0], sys.argv[1], sys.argv[2]
         )
         kwargs = dict(parse_qsl(sys.argv[2].lstrip("?")))
-        self.router.dispatch(**kwargs)
+        try:
+            with self.metrics.span("routing"):
+                self.router.dispatch(**kwargs)
+            with self.metrics.span("background"):
+                self.run_background_tasks()
+        except InvalidCredentialsException as exc:
+            xbmcgui.Dialog().ok(self.tr(30096).format(exc.api_name), self.tr(30097))
+            sys.exit(1)
+        except SRGSSRApiException as exc:
+            self.logger.warning("%s API request failed: %s", exc.api_name, exc.message)
+            if isinstance(exc, CircuitOpenException):
+                message = self.tr(30043)
+            elif isinstance(exc, QuotaExceededException):
+                message = self.tr(30044)
+            else:
+                message = self.tr(30045)
+            self._abort(kwargs.get("mode", ""), message.format(exc.api_name))
+        finally:
+            self.quota.flush()
+            self.metrics.finish(bu=self.bu, mode=kwargs.get("mode", ""))
         self.logger.debug("End of SRGSSR plugin")
 
+    def _abort(self, mode: str, message: str):
+        """Notifies the user of an error and tells Kodi the menu or the video failed
+        :param mode: The mode of the run
+        :param message: The notification message
+        """
+        xbmcgui.Dialog().notification(
+            self.ADDON.getAddonInfo("name"), message, xbmcgui.NOTIFICATION_ERROR
+        )
+        if self.HANDLE < 0:
+            return
+        if mode == "play_video":
+            xbmcplugin.setResolvedUrl(self.HANDLE, False, xbmcgui.ListItem())
+        else:
+            self._directory_items = []
+            xbmcplugin.endOfDirectory(self.HANDLE, succeeded=False)
+
+    def add_background_task(self, func, *args, **kwargs):
+        """Registers a task to run once the menu has been handed over to Kodi"""
+        self._background_tasks.append((func, args, kwargs))
+
+    def run_background_tasks(self):
+        """Runs the registered background tasks"""
+        # The menu is already displayed: background tasks must not be served stale data
+        self.stale_while_revalidate = False
+        while self._background_tasks:
+            func, args, kwargs = self._background_tasks.pop(0)
+            self.logger.debug("Running background task %s", func.__name__)
+            try:
+                func(*args, **kwargs)
+            except InvalidCredentialsException:
+                raise
+            except SRGSSRApiException as exc:
+                self.logger.warning("Background task %s failed: %s", func.__name__, exc.message)
+
+    def set_category(self, name: str):
+        """Sets the name of the current menu"""
+        xbmcplugin.setPluginCategory(self.HANDLE, name)
+
     def bu_menu(self):
         """Builds the Business Units Menu"""
         for bu in self._bu_menu_items():
             self._add_item_to_directory(
                 bu.name, url=bu.url, thumbnail_image=bu.icon, is_folder=True
             )
-        xbmcplugin.endOfDirectory(self.HANDLE)
+        self._end_of_directory()
 
     def main_menu(self):
         """Builds the Main Menu"""
@@ -162,16 +275,18 @@ class Plugin:
             self._add_item_to_directory(
                 menu.name, menu.url, thumbnail_image=menu.icon, is_folder=True
             )
-        xbmcplugin.endOfDirectory(self.HANDLE)
+        self._end_of_directory()
 
     def all_tv_shows(self):
         """Menu that lists all the TV Shows"""
-        only_active_shows = not to_bool(self.settings.show_inactive_shows)
-        shows = self.video_client.get_tv_shows(self.bu, only_active_shows=only_active_shows)[
-            "showList"
-        ]
+        only_active_shows = not self.settings.show_inactive_shows
+        if self.cache.enabled:
+            shows = self.get_show_catalog(only_active_shows).shows
+        else:
+            # The shows are decoded while they are downloaded, the response isn't kept whole
+            shows = self.video_client.iter_tv_shows(self.bu, only_active_shows=only_active_shows)
         self.tv_shows_menu(shows)
-        xbmcplugin.endOfDirectory(self.HANDLE)
+        self._end_of_directory()
 
     def tv_shows_by_letter(self, letter: str = ""):
         """Menu that lists the TV Shows sorted by their first letter"""
@@ -189,40 +304,23 @@ class Plugin:
                     is_folder=True,
                 )
         else:
-            only_active_shows = not to_bool(self.settings.show_inactive_shows)
-            shows = self.video_client.get_tv_shows(
-                self.bu, letter, only_active_shows=only_active_shows
-            )["showList"]
+            only_active_shows = not self.settings.show_inactive_shows
+            if self.cache.enabled:
+                shows = self.get_show_catalog(only_active_shows).by_letter(letter)
+            else:
+                shows = self.video_client.iter_tv_shows(
+                    self.bu, letter, only_active_shows=only_active_shows
+                )
             self.tv_shows_menu(shows)
-        xbmcplugin.endOfDirectory(self.HANDLE)
+        self._end_of_directory()
 
-    def tv_shows_menu(self, shows: list):
+    def tv_shows_menu(self, shows):
         """Helper building a menu containing TV Shows
-        :param shows: List containg the TV Shows collected from the API
+        :param shows: Iterable of the TV Shows collected from the API
         """
         self.logger.debug("Builds TV Shows Menu")
         for show in shows:
-            image_url = show.get("imageUrl", "")
-
-            description = show.get("description")
-            if not description:  # sometimes lead contains th description
-                description = show.get("lead", "")
-
-            url_args = {
-                "number_of_episodes": show.get("numberOfEpisodes", 0),
-                "tv_show_id": quote_plus(show.get("id")),
-            }
-
-            name = show.get("title", "")
-            self._add_item_to_directory(
-                name,
-                self.router.url(mode="list_episodes_by_show", **url_args),
-                description,
-                video_info={"title": name, "plot": description, "plotoutline": description},
-                thumbnail_image=image_url,
-                fanart=image_url,
-                is_folder=True,
-            )
+            self._add_show_to_directory(show)
 
     def videos_by_topic(self):
         """Menu listing the topics"""
@@ -238,18 +336,20 @@ class Plugin:
                 thumbnail_image=image_url,
                 is_folder=True,
             )
-        xbmcplugin.endOfDirectory(self.HANDLE)
+        self._end_of_directory()
 
     def list_videos_by_topic(
-        self, topic_id: str, current_page: int, number_of_episodes: int, next_page_id=""
+        self,
+        topic_id: str,
+        current_page: int,
+        number_of_episodes: int,
+        next_page_id="",
+        offset: int = 0,
     ):
         """Menu listing the Videos of a topic"""
-        number_of_episodes_per_page = int(self.settings.number_of_episodes_per_page)
-        res = self.video_client.get_latest_episodes(
-            self.bu,
-            topic_id=topic_id,
-            page_size=number_of_episodes_per_page,
-            next_page_id=next_page_id,
+        url_args = {"topic_id": topic_id}
+        res, next_cursor = self.get_page(
+            "list_videos_by_topic", url_args, current_page, next_page_id, offset
         )
 
         media_list = res.get("mediaList")
@@ -258,31 +358,36 @@ class Plugin:
             show = media.get("show")
             self._add_video_to_directory(show, episode, media)
 
-        next_page_url = res.get("next")
-        if next_page_url:
+        if next_cursor is not None:
             self._add_next_page_to_directory(
                 current_page,
-                next_page_url,
+                next_cursor,
                 number_of_episodes,
                 "list_videos_by_topic",
-                {"topic_id": topic_id},
+                url_args,
             )
-        xbmcplugin.endOfDirectory(self.HANDLE)
+        self._end_of_directory()
 
     def list_episodes_by_show(
-        self, tv_show_id: str, current_page: int, number_of_episodes: int, next_page_id=""
+        self,
+        tv_show_id: str,
+        current_page: int,
+        number_of_episodes: int,
+        next_page_id="",
+        offset: int = 0,
     ):
         """Lists the latest episodes of a TV Show
         :param tv_show_id: The id of the TV Show
         :param current_page: Index of the current episodes page
         :param number_of_episodes: Total number of episodes of the show
-        :param next_page_id: ID of the next page of episodes
+        :param next_page_id: ID of the chunk of episodes containing the page (see `get_page`)
+        :param offset: Position of the first episode of the page in its chunk
         """
         xbmcplugin.setContent(self.HANDLE, "episodes")
 
-        number_of_episodes_per_page = int(self.settings.number_of_episodes_per_page)
-        res = self.video_client.get_latest_episodes(
-            self.bu, tv_show_id, page_size=number_of_episodes_per_page, next_page_id=next_page_id
+        url_args = {"tv_show_id": tv_show_id}
+        res, next_cursor = self.get_page(
+            "list_episodes_by_show", url_args, current_page, next_page_id, offset
         )
 
         show = res.get("show")
@@ -293,41 +398,101 @@ class Plugin:
                 media = episode.get("mediaList")[0]
                 self._add_video_to_directory(show, episode, media)
 
-            next_page_url = res.get("next")
-            if next_page_url:
+            if (
+                self.settings.prefetch_subtitles
+                and self.settings.enable_subtitles
+                and self.settings.consumerKeySubtitles
+                and self.settings.consumerSecretSubtitles
+                and not self.subs_client.quota_low
+            ):
+                video_ids = [episode.get("id") for episode in episodes]
+                self.add_background_task(self._prefetch_subtitles, video_ids)
+
+            if next_cursor is not None:
                 self._add_next_page_to_directory(
                     current_page,
-                    next_page_url,
+                    next_cursor,
                     number_of_episodes,
                     "list_episodes_by_show",
-                    {"tv_show_id": quote_plus(show.get("id"))},
+                    url_args,
                 )
-        xbmcplugin.endOfDirectory(self.HANDLE)
+        self._end_of_directory()
 
-    def trending(self, current_page: int, next_page_id=""):
+    def trending(self, current_page: int, next_page_id="", offset: int = 0):
         """Menu listing the Trending videos"""
-        number_of_episodes_per_page = int(self.settings.number_of_episodes_per_page)
-        res = self.video_client.get_trendings(self.bu, number_of_episodes_per_page, next_page_id)
+        res, next_cursor = self.get_page("trending", {}, current_page, next_page_id, offset)
 
         for media in res.get("mediaList"):
             show = media.get("show")
             episode = media.get("episode")
             self._add_video_to_directory(show, episode, media)
 
-        next_page_url = res.get("next")
-        if next_page_url:
+        if next_cursor is not None:
             self._add_next_page_to_directory(
                 current_page,
-                next_page_url,
+                next_cursor,
                 0,
                 "trending",
             )
-        xbmcplugin.endOfDirectory(self.HANDLE)
+        self._end_of_directory()
 
-    def search_menu(self, search_type: str = ""):
+    def search_videos(
+        self, search_string: str, current_page: int, next_page_id="", offset: int = 0
+    ):
+        """Menu listing the videos matching a search string
+        :param search_string: The searched string
+        :param current_page: Index of the current results page
+        :param next_page_id: ID of the chunk of results containing the page (see `get_page`)
+        :param offset: Position of the first result of the page in its chunk
+        """
+        url_args = {"query": search_string}
+        res, next_cursor = self.get_page(
+            "search_videos", url_args, current_page, next_page_id, offset
+        )
+
+        for media in res.get("searchResultListMedia") or []:
+            show = media.get("show")
+            episode = media.get("episode")
+            self._add_video_to_directory(show, episode, media)
+
+        if next_cursor is not None:
+            self._add_next_page_to_directory(
+                current_page,
+                next_cursor,
+                0,
+                "search_videos",
+                url_args,
+            )
+        self._end_of_directory()
+
+    def jump_to_page(self, url_mode: str, url_args: dict, number_of_episodes: int):
+        """Asks for a page number and lists this page of a paged listing
+
+        Only the episodes of a show have a known number of pages: the other listings don't offer
+        to jump to a page.
+        :param url_mode: The mode of the paged listing
+        :param url_args: The arguments of the paged listing
+        :param number_of_episodes: Total number of episodes of the listing
+        """
+        number_of_pages = self._compute_number_of_pages(
+            self.settings.number_of_episodes_per_page, number_of_episodes
+        )
+        page = xbmcgui.Dialog().numeric(0, self.tr(30042).format(number_of_pages))
+        if not page:
+            return
+
+        page = min(max(int(page), 1), number_of_pages)
+        page, chunk_id, offset = self._find_page_cursor(url_mode, url_args, page)
+        if url_mode == "list_episodes_by_show":
+            self.list_episodes_by_show(
+                url_args["tv_show_id"], page, number_of_episodes, chunk_id, offset
+            )
+
+    def search_menu(self, search_type: str = "", all_bus: bool = False):
         """Search menu.
         :param search_type: Either "tv_shows", "videos", or empty.
                             If empty, listing the type available type of search. Else, showing a keyboard to search.
+        :param all_bus: If true, searching in all the business units at once
         """
         if not search_type:
             self._add_item_to_directory(
@@ -340,47 +505,278 @@ class Plugin:
                 self.router.url(mode="search", **{"type": "videos"}),
                 is_folder=True,
             )
+            self._add_item_to_directory(
+                self.tr(30033),
+                self.router.url(mode="search", **{"type": "tv_shows", "all_bus": "true"}),
+                is_folder=True,
+            )
+            self._add_item_to_directory(
+                self.tr(30034),
+                self.router.url(mode="search", **{"type": "videos", "all_bus": "true"}),
+                is_folder=True,
+            )
         else:
             if search_type == "tv_shows":
                 search_string = xbmcgui.Dialog().input(self.tr(30031))
                 if search_string != '':
-                    res = self.video_client.get_tv_shows(self.bu, string_filter=search_string)
-                    self.tv_shows_menu(res.get("searchResultListShow"))
+                    if all_bus:
+                        results = self._search_all_bus(self._search_tv_shows, search_string)
+                        for bu, show in results:
+                            self._add_show_to_directory(show, bu)
+                    elif self.cache.enabled:
+                        # Searching in all the shows, as the API search does
+                        shows = self.get_show_catalog(False).search(search_string)
+                        self.tv_shows_menu(shows)
+                    else:
+                        shows = self._search_tv_shows(self.video_client, self.bu, search_string)
+                        self.tv_shows_menu(shows)
                 else:
                     return
             elif search_type == "videos":
                 search_string = xbmcgui.Dialog().input(self.tr(30032))
                 if search_string != '':
-                    res = self.video_client.search_video(self.bu, search_string, page_size=20)
-                    for media in res.get("searchResultListMedia"):
-                        show = media.get("show")
-                        episode = media.get("episode")
-                        self._add_video_to_directory(show, episode, media)
-                        # TODO: Add next page
+                    if all_bus:
+                        results = self._search_all_bus(self._search_videos, search_string)
+                        for bu, media in results:
+                            show = media.get("show")
+                            episode = media.get("episode")
+                            self._add_video_to_directory(show, episode, media, bu)
+                    else:
+                        # Paged listing, which closes the directory itself
+                        self.search_videos(search_string, 1)
+                        return
                 else:
                     return
 
-        xbmcplugin.endOfDirectory(self.HANDLE)
+        self._end_of_directory()
+
+    @staticmethod
+    def _search_tv_shows(video_client: SRGSSRVideoApiClient, bu: str, search_string: str) -> list:
+        """Returns the TV Shows of a BU matching the search string"""
+        res = video_client.get_tv_shows(bu, string_filter=search_string)
+        return res.get("searchResultListShow") or []
+
+    @staticmethod
+    def _search_videos(video_client: SRGSSRVideoApiClient, bu: str, search_string: str) -> list:
+        """Returns the first videos of a BU matching the search string"""
+        res = video_client.search_video(bu, search_string, page_size=20)
+        return res.get("searchResultListMedia") or []
+
+    def _search_all_bus(self, search_func, search_string: str) -> list:
+        """Runs a search in all the business units concurrently
 
-    def play_video(self, video_id: str, media_id: str):
+        A business unit whose search fails is skipped.
+        :param search_func: The search of a BU, called with (video_client, bu, search_string)
+        :param search_string: The searched string
+        :return: The (bu, item) found, in the BUs order and without duplicated URNs
+        """
+        # The client is created in this thread, as it may have to open the settings
+        video_client = self.video_client
+        with self.metrics.span("search.all_bus"), ThreadPoolExecutor(
+            max_workers=len(self.BUSINESS_UNITS)
+        ) as executor:
+            futures = [
+                (
+                    bu,
+                    executor.submit(
+                        self.metrics.timed,
+                        f"search.{bu}",
+                        search_func,
+                        video_client,
+                        bu,
+                        search_string,
+                    ),
+                )
+                for bu in self.BUSINESS_UNITS
+            ]
+
+        results = []
+        urns = set()
+        for bu, future in futures:
+            try:
+                items = future.result()
+            except InvalidCredentialsException:
+                raise
+            except SRGSSRApiException as exc:
+                self.logger.warning("Search in %s failed: %s", bu, exc.message)
+                continue
+            for item in items:
+                urn = item.get("urn") or f"{bu}:{item.get('id')}"
+                if urn not in urns:
+                    urns.add(urn)
+                    results.append((bu, item))
+        return results
+
+    def purge_cache(self):
+        """Deletes all the cached API responses and the TV Shows catalogs"""
+        self.cache.purge()
+        ShowCatalog.purge(os.path.join(self.profile_path, self.CATALOGS_FOLDER), self.logger)
+        xbmcgui.Dialog().notification(self.ADDON.getAddonInfo("name"), self.tr(30040), self.icon)
+
+    def play_video(self, video_id: str, media_id: str, tv_show_id: str = ""):
         """Plays the selected video
+
+        The subtitles are looked up while the media URL is resolved.
         :param video_id: The video ID
         :param media_id: The media ID
+        :param tv_show_id: The ID of the show of the video, if known. Lets the service prepare
+                           the next episode of the show
         """
-        media_composition = self.video_client.get_media_composition(self.bu, media_id)
-        resource = self._get_media_resource(media_composition)
-        media_url = self._get_media_url(resource["url"])
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            subtitles = None
+            if self.settings.enable_subtitles:
+                # The client is created in this thread, as it may have to open the settings
+                subtitles = executor.submit(
+                    self.metrics.timed,
+                    "play.subtitles",
+                    self._get_subtitles,
+                    self.subs_client,
+                    video_id,
+                )
+
+            resource, media_url = self._resolve_stream(media_id)
+
+            liz = xbmcgui.ListItem(path=media_url)
+            liz.setProperty("isPlayable", "true")
+            with self.metrics.span("play.inputstream"):
+                self._set_inputstream_params(
+                    liz, resource["protocol"].lower(), resource["mimeType"]
+                )
+
+            if subtitles:
+                try:
+                    subs = subtitles.result()
+                except InvalidCredentialsException:
+                    raise
+                except SRGSSRApiException as exc:
+                    self.logger.warning("Unable to get the subtitles: %s", exc.message)
+                    subs = []
+                if subs:
+                    liz.setSubtitles(subs)
 
-        liz = xbmcgui.ListItem(path=media_url)
-        liz.setProperty("isPlayable", "true")
-        self._set_inputstream_params(liz, resource["protocol"].lower(), resource["mimeType"])
-        self._add_subtitles(liz, video_id)
-        self.logger.debug(f"Playing episode {self.bu} {media_id} (media URL: {media_url})")
+        self.logger.debug("Playing episode %s %s (media URL: %s)", self.bu, media_id, media_url)
+        self._set_playing_episode(tv_show_id, video_id, media_id, media_url)
         xbmcplugin.setResolvedUrl(self.HANDLE, True, liz)
 
+    def _set_playing_episode(self, tv_show_id: str, video_id: str, media_id: str, media_url: str):
+        """Tells the service which episode is played, see `playing_episode`"""
+        playing = {
+            "bu": self.bu,
+            "tv_show_id": tv_show_id,
+            "video_id": video_id,
+            "media_id": media_id,
+            "url": media_url,
+        }
+        window = xbmcgui.Window(self.HOME_WINDOW_ID)
+        window.setProperty(f"{self.ADDON_ID}.playing", json.dumps(playing) if tv_show_id else "")
+
+    def playing_episode(self) -> dict:
+        """Returns the episode last played by the plugin
+
+        :return: The bu, tv_show_id, video_id, media_id and media URL of the episode, or None if
+                 the last played video has no known show
+        """
+        playing = xbmcgui.Window(self.HOME_WINDOW_ID).getProperty(f"{self.ADDON_ID}.playing")
+        try:
+            return json.loads(playing) if playing else None
+        except ValueError:
+            return None
+
+    def next_episode(self, tv_show_id: str, video_id: str) -> dict:
+        """Returns the episode of a show broadcast after a video
+
+        Only the first chunk of the show's episodes is searched, which is the one the plugin lists
+        and caches first.
+        :param tv_show_id: The show ID
+        :param video_id: The ID of the current episode
+        :return: The episode, or None if the video is the latest episode or isn't found
+        """
+        res = self.video_client.get_latest_episodes(
+            self.bu, tv_show_id, page_size=self._chunk_size()
+        )
+        episodes = res.get("episodeList") or []
+        ids = [episode.get("id") for episode in episodes]
+        if video_id not in ids:
+            return None
+        # The latest episodes come first
+        position = ids.index(video_id)
+        return episodes[position - 1] if position > 0 else None
+
+    def preload_video(self, video_id: str, media_id: str):
+        """Resolves a video like `play_video` does, so playing it afterwards is served from cache
+
+        :param video_id: The video ID
+        :param media_id: The media ID
+        """
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            subtitles = None
+            if (
+                self.settings.enable_subtitles
+                and self.settings.consumerKeySubtitles
+                and self.settings.consumerSecretSubtitles
+            ):
+                subtitles = executor.submit(
+                    self.metrics.timed,
+                    "play.subtitles",
+                    self._get_subtitles,
+                    self.subs_client,
+                    video_id,
+                )
+            self._resolve_stream(media_id)
+            if subtitles:
+                try:
+                    subtitles.result()
+                except SRGSSRApiException as exc:
+                    self.logger.warning("Unable to get the subtitles: %s", exc.message)
+        self.logger.debug("Preloaded episode %s %s", self.bu, media_id)
+
+    def _resolve_stream(self, media_id: str) -> tuple:
+        """Returns the resource and the media URL to play a media
+
+        A media played again shortly (resume, replay...) reuses the cached resolution, as long
+        as its Akamai token is valid.
+        :param media_id: The media ID
+        :return: The resource (see `_get_media_resource`) and the media URL
+        """
+        key = self.cache.key("stream", self.bu, media_id)
+        with self.metrics.span("cache", path="stream") as span:
+            stream = self.cache.get(key)
+            span["hit"] = stream is not None
+        if stream is not None:
+            self.logger.debug("Reusing resolved stream of %s %s", self.bu, media_id)
+            return stream["resource"], stream["url"]
+
+        with self.metrics.span("play.media_composition"):
+            media_composition = self.video_client.get_media_composition(self.bu, media_id)
+        resource = self._get_media_resource(media_composition)
+        with self.metrics.span("play.media_url"):
+            media_url = self._get_media_url(resource["url"])
+
+        ttl = self._stream_ttl(media_url)
+        if ttl > 0:
+            self.cache.set(key, {"resource": resource, "url": media_url}, ttl)
+        return resource, media_url
+
+    def _stream_ttl(self, media_url: str) -> int:
+        """Returns how many seconds a media URL can be reused, bounded by its token expiration"""
+        token_expiration = re.search(r"\bexp=(\d+)", urlparse(media_url).query)
+        if not token_expiration:
+            return self.STREAM_CACHE_TTL
+        validity = int(token_expiration.group(1)) - time.time() - self.STREAM_TOKEN_MARGIN
+        return int(min(self.STREAM_CACHE_TTL, validity))
+
     def _get_media_resource(self, media_composition) -> dict:
-        """Parses the media composition object to find the best resource and return it"""
-        resource_list = media_composition["chapterList"][0]["resourceList"]
+        """Parses the media composition object to find the best resource and return it
+
+        :raise SRGSSRApiException if the media composition has no resource (e.g. a video which
+               isn't available yet, or not in this country)
+        """
+        chapters = media_composition.get("chapterList") or [{}]
+        resource_list = chapters[0].get("resourceList") or []
+        if not resource_list:
+            raise SRGSSRApiException(
+                self.video_client.api_name, "No playable resource in the media composition"
+            )
         sd_hls_resources = []
         for resource in resource_list:
             if resource["protocol"] == "HLS":
@@ -403,52 +799,169 @@ class Plugin:
         if "akamaihd" in parsed_url.netloc:
             self.logger.debug("AkamaiHD video")
             token_url = f"http://tp.srgssr.ch/akahd/token?acl={parsed_url.path}"
-            response = requests.get(token_url).json()
+            # Using the API client session to reuse its pooled connections
+            response = self.video_client.session.get(token_url, timeout=self.timeout).json()
             token = response["token"]["authparams"]
             media_url += "?" + token
         return media_url
 
     def _set_inputstream_params(self, listitem, protocol, mime_type):
         """If Inputstream Adaptive is enabled and available, configure it and update the ListItem"""
+        import inputstreamhelper  # pylint: disable=import-outside-toplevel
+
         is_helper = inputstreamhelper.Helper(protocol)
-        if to_bool(self.settings.enable_inputstream_adaptive) and is_helper.check_inputstream():
+        if self.settings.enable_inputstream_adaptive and is_helper.check_inputstream():
             listitem.setContentLookup(False)
             listitem.setMimeType(mime_type)
             listitem.setProperty("inputstream", is_helper.inputstream_addon)
             listitem.setProperty("inputstream.adaptive.manifest_type", protocol)
 
-    def _add_subtitles(self, listitem, video_id):
-        """If subtitles are enable and available, add them to the ListItem"""
-        self.logger.debug(f"Getting subtitles for video {video_id}")
-        if to_bool(self.settings.enable_subtitles):
-            video_urn = f"urn:{self.bu}:episode:tv:{video_id}"
-            resp = self.subs_client.get_subtitles(video_urn)
-
-            subs = []
-            for asset in resp["data"]["assets"]:
-                if asset is not None:
-                    for sub in asset["hasSubtitling"]:
-                        subs.append(sub["identifier"])
-            if subs:
-                self.logger.debug(f"Found subtitles: {subs}")
-                listitem.setSubtitles(subs)
+    def _get_subtitles(self, subs_client: SRGSSRSubtitlesApiClient, video_id: str) -> list:
+        """Returns the available subtitles of a video
+
+        The result is cached, including when the video has no subtitles.
+        """
+        subs = self._cached_subtitles(video_id)
+        if subs is not None:
+            self.logger.debug("Cached subtitles for video %s: %s", video_id, subs)
+            return subs
+
+        self.logger.debug("Getting subtitles for video %s", video_id)
+        video_urn = f"urn:{self.bu}:episode:tv:{video_id}"
+        resp = subs_client.get_subtitles(video_urn)
+
+        subs = []
+        for asset in resp["data"]["assets"]:
+            if asset is not None:
+                for sub in asset["hasSubtitling"]:
+                    subs.append(sub["identifier"])
+        if subs:
+            self.logger.debug("Found subtitles: %s", subs)
+        self.cache.set(
+            self.cache.key("subtitles", video_urn),
+            subs,
+            self.SUBTITLES_CACHE_TTL if subs else self.NO_SUBTITLES_CACHE_TTL,
+        )
+        return subs
+
+    def _cached_subtitles(self, video_id: str, bu: str = None) -> list:
+        """Returns the cached subtitles of a video, or None if they are unknown"""
+        video_urn = f"urn:{bu or self.bu}:episode:tv:{video_id}"
+        return self.cache.get(self.cache.key("subtitles", video_urn))
+
+    def _prefetch_subtitles(self, video_ids: list):
+        """Looks up the subtitles of videos which aren't cached yet, so the next listing of the
+        videos can flag those with subtitles
+        """
+        video_ids = [video_id for video_id in video_ids if self._cached_subtitles(video_id) is None]
+        if not video_ids:
+            return
+
+        subs_client = self.subs_client
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [
+                executor.submit(self._get_subtitles, subs_client, video_id)
+                for video_id in video_ids
+            ]
+        for future in futures:
+            try:
+                future.result()
+            except InvalidCredentialsException:
+                raise
+            except SRGSSRApiException as exc:
+                self.logger.warning("Unable to prefetch the subtitles: %s", exc.message)
 
     # ================================= Helper methods ==================================
 
-    def _add_video_to_directory(self, show: dict, episode: dict, media: dict):
-        """Helper that adds a "Video" item to the Directory"""
+    def get_show_catalog(self, only_active_shows: bool) -> ShowCatalog:
+        """Helper returning the local TV Shows catalog of the BU
+
+        The catalog is downloaded if missing, and refreshed in background when outdated
+        """
+        shows_filter = "active" if only_active_shows else "all"
+        catalog = ShowCatalog(
+            os.path.join(self.profile_path, self.CATALOGS_FOLDER, f"{self.bu}_{shows_filter}.json"),
+            self.logger,
+        )
+        if catalog.is_empty:
+            self._refresh_show_catalog(catalog, only_active_shows)
+        elif catalog.is_outdated:
+            self.add_background_task(self._refresh_show_catalog, catalog, only_active_shows)
+        return catalog
+
+    def _refresh_show_catalog(self, catalog: ShowCatalog, only_active_shows: bool):
+        """Helper updating a TV Shows catalog from the API
+
+        The shows are only downloaded if the API doesn't tell they didn't change since the
+        last update of the catalog.
+        """
+        shows, validators = self.video_client.get_tv_shows_if_changed(
+            self.bu, only_active_shows, catalog.validators
+        )
+        if shows is None:
+            catalog.touch(validators)
+        else:
+            catalog.update(shows, validators)
+
+    def _add_show_to_directory(self, show: dict, bu: str = None):
+        """Helper that adds a "TV Show" item to the Directory
+        :param show: The TV Show collected from the API
+        :param bu: The BU of the show, shown in its name. If not given, the current BU
+        """
+        image_url = show.get("imageUrl", "")
+
+        description = show.get("description")
+        if not description:  # sometimes lead contains th description
+            description = show.get("lead", "")
+
+        url_args = {
+            "number_of_episodes": show.get("numberOfEpisodes", 0),
+            "tv_show_id": quote_plus(show.get("id")),
+        }
+
+        name = show.get("title", "")
+        if bu:
+            name = f"[{bu.upper()}] {name}"
+        self._add_item_to_directory(
+            name,
+            self.router.url(bu, mode="list_episodes_by_show", **url_args),
+            description,
+            video_info={"title": name, "plot": description, "plotoutline": description},
+            thumbnail_image=image_url,
+            fanart=image_url,
+            is_folder=True,
+        )
+
+    def _add_video_to_directory(self, show: dict, episode: dict, media: dict, bu: str = None):
+        """Helper that adds a "Video" item to the Directory
+        :param bu: The BU of the video, shown in its name. If not given, the current BU
+        """
         url_args = {
             "video_id": episode.get("id"),
             "media_id": media.get("id"),
         }
+        if show.get("id"):
+            url_args["tv_show_id"] = show["id"]
 
         vid_name = episode.get("title", "") + " - " + media.get("title", "") if episode.get("title", "") != media.get("title", "") else episode.get("title", "")
+        if bu:
+            vid_name = f"[{bu.upper()}] {vid_name}"
         vid_desc = media.get("description", "")
         duration = int(media.get("duration", 0) // 1000)
 
+        properties = {"IsPlayable": "true"}
+        # Only the prefetched subtitles are cached for most videos: without prefetching, the
+        # lookup of each video would cost a cache read for nearly nothing
+        if (
+            self.settings.prefetch_subtitles
+            and self.settings.enable_subtitles
+            and self._cached_subtitles(episode.get("id"), bu)
+        ):
+            properties["HasSubtitles"] = "true"
+
         self._add_item_to_directory(
             vid_name,
-            self.router.url(mode="play_video", **url_args),
+            self.router.url(bu, mode="play_video", **url_args),
             label2=vid_desc,
             thumbnail_image=media.get("imageUrl", ""),
             fanart=show.get("imageUrl", ""),
@@ -458,28 +971,58 @@ class Plugin:
                 "Plot": vid_desc,
                 "Aired": episode.get("publishedDate", ""),
             },
-            properties={"IsPlayable": "true"},
+            properties=properties,
         )
 
     def _add_next_page_to_directory(
         self,
         current_page: int,
-        next_page_url: str,
+        next_cursor: tuple,
         number_of_episodes: int,
         url_mode: str,
         url_args: dict = None,
     ):
-        """Helper method to adds a "next page" item to the directory"""
-        url_args = {} if url_args is None else url_args
-        number_of_episodes_per_page = int(self.settings.number_of_episodes_per_page)
+        """Helper method to adds a "next page" item to the directory
+
+        A "go to page" item is added too when the number of pages is known, and the next page
+        is prefetched in background if enabled.
+        :param next_cursor: The chunk ID and the offset of the next page (see `get_page`)
+        """
+        next_page_id, next_offset = next_cursor
+        url_args = {} if url_args is None else dict(url_args)
+        number_of_episodes_per_page = self.settings.number_of_episodes_per_page
         number_of_pages = self._compute_number_of_pages(
             number_of_episodes_per_page, number_of_episodes
         )
         liz_name = self.tr(30020).format(current_page, f"/{number_of_pages}" if number_of_pages else "")
-        next_page_id = dict(parse_qsl(urlparse(next_page_url).query)).get("next")
         next_page = current_page + 1
 
+        if (
+            self.settings.prefetch_next_page
+            and self.cache.enabled
+            and not self.video_client.quota_low
+        ):
+            self.add_background_task(
+                self.get_page, url_mode, dict(url_args), next_page, next_page_id, next_offset
+            )
+
+        if number_of_pages > 2:
+            jump_name = self.tr(30041)
+            self._add_item_to_directory(
+                jump_name,
+                self.router.url(
+                    mode="jump_to_page",
+                    target_mode=url_mode,
+                    number_of_episodes=number_of_episodes,
+                    **url_args,
+                ),
+                video_info={"title": jump_name},
+                is_folder=True,
+            )
+
         url_args.update({"next_page_id": next_page_id, "current_page": next_page, "number_of_episodes": number_of_episodes })
+        if next_offset:
+            url_args["offset"] = next_offset
 
         self._add_item_to_directory(
             liz_name,
@@ -489,6 +1032,146 @@ class Plugin:
             is_folder=True,
         )
 
+    @staticmethod
+    def _next_page_id(next_page_url: str) -> str:
+        """Helper method extracting the next page ID from the "next" URL of an API response"""
+        return dict(parse_qsl(urlparse(next_page_url).query)).get("next", "")
+
+    def _chunk_size(self) -> int:
+        """Helper method returning the number of items requested at once to the API
+
+        The largest multiple of the page size accepted by the API, so a page is usually not split
+        between two chunks. The API may still return less items per chunk (see `get_page`)
+        """
+        page_size = self.settings.number_of_episodes_per_page
+        return max(page_size, (self.MAX_API_PAGE_SIZE // page_size) * page_size)
+
+    def _listing_key(self, url_mode: str, url_args: dict) -> str:
+        """Helper method returning the key of a paged listing in the cursor index
+
+        The chunks of a listing are indexed by the position of their first item
+        """
+        args = "&".join(f"{key}={value}" for key, value in sorted(url_args.items()))
+        return f"{self.bu}|{url_mode}|{args}|{self._chunk_size()}|position"
+
+    def _get_chunk(
+        self, url_mode: str, url_args: dict, chunk_id: str, chunk_position: int
+    ) -> tuple:
+        """Helper method returning a chunk of a paged listing
+
+        The cursor of the following chunk is stored in the cursor index.
+        :param chunk_id: The cursor of the chunk (empty for the first chunk)
+        :param chunk_position: The position of the first item of the chunk in the listing
+        :return: The response, the key of its items and the cursor of the following chunk (empty
+                 if it is the last chunk)
+        """
+        chunk_size = self._chunk_size()
+        if url_mode == "list_episodes_by_show":
+            items_key = "episodeList"
+            res = self.video_client.get_latest_episodes(
+                self.bu, url_args["tv_show_id"], page_size=chunk_size, next_page_id=chunk_id
+            )
+        elif url_mode == "list_videos_by_topic":
+            items_key = "mediaList"
+            res = self.video_client.get_latest_episodes(
+                self.bu,
+                topic_id=url_args["topic_id"],
+                page_size=chunk_size,
+                next_page_id=chunk_id,
+            )
+        elif url_mode == "search_videos":
+            items_key = "searchResultListMedia"
+            res = self.video_client.search_video(
+                self.bu, url_args["query"], page_size=chunk_size, next_page_id=chunk_id
+            )
+        else:
+            items_key = "mediaList"
+            res = self.video_client.get_trendings(self.bu, chunk_size, chunk_id)
+
+        following_chunk_id = self._next_page_id(res.get("next") or "")
+        if following_chunk_id:
+            listing = self._listing_key(url_mode, url_args)
+            following_position = chunk_position + len(res.get(items_key) or [])
+            self.cursor_index.set(listing, following_position, following_chunk_id)
+        return res, items_key, following_chunk_id
+
+    def get_page(
+        self, url_mode: str, url_args: dict, page: int, chunk_id: str, offset: int = 0
+    ) -> tuple:
+        """Helper method returning a page of a paged listing and the cursor of the next page
+
+        The API is requested by chunks of several pages (see `_chunk_size`), and the page is
+        sliced from its chunk. The API may return less items than requested while having more:
+        the page is then completed with the first items of the following chunk.
+        :param url_mode: The mode of the listing (list_episodes_by_show, list_videos_by_topic,
+                         trending or search_videos)
+        :param url_args: The arguments of the listing (tv_show_id, topic_id or query)
+        :param page: The number of the page
+        :param chunk_id: The cursor of the chunk containing the page (empty for the first chunk)
+        :param offset: The position of the first item of the page in its chunk
+        :return: The response containing only the items of the page, and the (chunk ID, offset)
+                 of the next page (None if it is the last page)
+        """
+        page_size = self.settings.number_of_episodes_per_page
+        # All the pages before this one are complete
+        chunk_position = (page - 1) * page_size - offset
+
+        first_res = None
+        page_items = []
+        while True:
+            res, items_key, following_chunk_id = self._get_chunk(
+                url_mode, url_args, chunk_id, chunk_position
+            )
+            if first_res is None:
+                first_res = res
+            items = res.get(items_key) or []
+            offset = min(offset, len(items))
+            taken = items[offset : offset + page_size - len(page_items)]
+            page_items += taken
+            offset += len(taken)
+
+            if offset < len(items):
+                next_cursor = (chunk_id, offset)
+                break
+            if not following_chunk_id or not items:
+                next_cursor = None
+                break
+            chunk_position += len(items)
+            chunk_id, offset = following_chunk_id, 0
+            if len(page_items) == page_size:
+                next_cursor = (chunk_id, offset)
+                break
+
+        return dict(first_res, **{items_key: page_items}), next_cursor
+
+    def _find_page_cursor(self, url_mode: str, url_args: dict, page: int) -> tuple:
+        """Helper method returning (page, chunk ID, offset) of a page of a paged listing
+
+        Starting from the closest known chunk, the chunks are walked until the one containing the
+        first item of the page. If the listing has less pages than expected, its last page is
+        returned.
+        """
+        page_size = self.settings.number_of_episodes_per_page
+        position = (page - 1) * page_size
+
+        listing = self._listing_key(url_mode, url_args)
+        chunk_position, chunk_id = self.cursor_index.closest(listing, position)
+        while True:
+            res, items_key, following_chunk_id = self._get_chunk(
+                url_mode, url_args, chunk_id, chunk_position
+            )
+            number_of_items = len(res.get(items_key) or [])
+            if position < chunk_position + number_of_items:
+                return page, chunk_id, position - chunk_position
+            if not following_chunk_id:
+                last_page = self._compute_number_of_pages(
+                    page_size, chunk_position + number_of_items
+                )
+                if 1 <= last_page < page:
+                    return self._find_page_cursor(url_mode, url_args, last_page)
+                return 1, "", 0
+            chunk_position, chunk_id = chunk_position + number_of_items, following_chunk_id
+
     def _compute_number_of_pages(
         self, number_of_episodes_per_page: int, number_of_episodes: int
     ) -> int:
@@ -511,26 +1194,37 @@ class Plugin:
         subtitles: dict = None,
         is_folder: bool = False,
     ):
-        """Helper method that creates a ListItem and adds it to the xbmcplugin Directory"""
+        """Helper method that creates a ListItem and queues it for the xbmcplugin Directory
+
+        The items are added all at once by `_end_of_directory`
+        """
         liz = xbmcgui.ListItem(name, label2)
         if properties:
             liz.setProperties(properties)
         if video_info:
             liz.setInfo("video", video_info)
-        if poster:
-            liz.setArt({"poster": poster})
-        if fanart:
-            liz.setArt({"fanart": fanart})
-        if thumbnail_image:
-            liz.setArt({"thumb": thumbnail_image})
-        if icon_image:
-            liz.setArt({"icon": icon_image})
+
+        art = {
+            "poster": poster,
+            "fanart": fanart,
+            "thumb": thumbnail_image,
+            "icon": icon_image,
+        }
+        art = {
+            art_type: self.artwork.url(art_type, image) for art_type, image in art.items() if image
+        }
+        if art:
+            liz.setArt(art)
         if subtitles:
             liz.setSubtitles(subtitles)
 
-        xbmcplugin.addDirectoryItem(
-            self.HANDLE,
-            url,
-            listitem=liz,
-            isFolder=is_folder,
-        )
+        self._directory_items.append((url, liz, is_folder))
+
+    def _end_of_directory(self):
+        """Helper method that adds the queued items to the xbmcplugin Directory and closes it"""
+        with self.metrics.span("directory", items=len(self._directory_items)):
+            xbmcplugin.addDirectoryItems(
+                self.HANDLE, self._directory_items, len(self._directory_items)
+            )
+            self._directory_items = []
+            xbmcplugin.endOfDirectory(self.HANDLE)
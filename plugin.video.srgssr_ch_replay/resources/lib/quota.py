@@ -0,0 +1,132 @@
+"""Ledger of the requests sent with the rate-limited API keys"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+class QuotaLedger:
+    """Counts the requests sent per API key and per endpoint during the current day
+
+    The ledger is persisted in the addon profile folder, so the plugin processes and the service
+    share it. It's read once per invocation and the requests are counted in memory, then added
+    to the file by `flush`. Concurrent processes may lose a few counts: the ledger is an
+    estimation of the quota used, not an exact count.
+
+    Without daily limit, the requests aren't counted: the ledger only records the blocks after a
+    429 (Too Many Requests).
+    """
+
+    LOW_FRACTION = 0.1  # The quota is low when at most this fraction of it remains
+
+    def __init__(self, ledger_file: str, logger, daily_limit: int):
+        """
+        :param ledger_file: Path of the JSON file storing the counts
+        :param logger: The plugin logger
+        :param daily_limit: Number of requests allowed per key and per day. 0 for no limit
+        """
+        self._ledger_file = ledger_file
+        self._logger = logger
+        self._daily_limit = daily_limit
+        self._lock = threading.Lock()  # The API clients may be used from several threads
+        self._ledger = None  # Content of the file, read on first use
+        self._pending = {}  # {key_id: {endpoint: count}} not flushed to the file yet
+
+    @staticmethod
+    def key_id(api_key: str) -> str:
+        """Identifier of an API key in the ledger, so the key itself isn't stored"""
+        return hashlib.sha1(api_key.encode("utf-8")).hexdigest()[:12]
+
+    @staticmethod
+    def _today() -> str:
+        return time.strftime("%Y-%m-%d", time.gmtime())
+
+    def _load(self) -> dict:
+        try:
+            with open(self._ledger_file, encoding="utf-8") as ledger_file:
+                ledger = json.load(ledger_file)
+        except (OSError, ValueError):
+            return {}
+        # Only the current day is kept
+        return {key: day for key, day in ledger.items() if day.get("day") == self._today()}
+
+    def _save(self, ledger: dict):
+        tmp_path = f"{self._ledger_file}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as ledger_file:
+                json.dump(ledger, ledger_file)
+            os.replace(tmp_path, self._ledger_file)
+        except OSError as exc:
+            self._logger.warning("Unable to save the quota ledger: %s", exc)
+
+    def _day(self, ledger: dict, key_id: str) -> dict:
+        return ledger.setdefault(key_id, {"day": self._today(), "counts": {}, "blocked_until": 0})
+
+    @property
+    def _current(self) -> dict:
+        """The ledger as read at the start of the invocation, with its later changes"""
+        if self._ledger is None:
+            self._ledger = self._load()
+        return self._ledger
+
+    def counts(self, key_id: str) -> dict:
+        """Returns the number of requests sent today per endpoint"""
+        counts = dict(self._current.get(key_id, {}).get("counts", {}))
+        for endpoint, count in self._pending.get(key_id, {}).items():
+            counts[endpoint] = counts.get(endpoint, 0) + count
+        return counts
+
+    def remaining(self, key_id: str):
+        """Returns the number of requests left today, or None if there is no limit"""
+        if self._current.get(key_id, {}).get("blocked_until", 0) > time.time():
+            return 0
+        if not self._daily_limit:
+            return None
+        return max(0, self._daily_limit - sum(self.counts(key_id).values()))
+
+    def is_low(self, key_id: str) -> bool:
+        """Returns true if the requests which can be avoided shouldn't be sent"""
+        remaining = self.remaining(key_id)
+        return remaining is not None and remaining <= self._daily_limit * self.LOW_FRACTION
+
+    def is_exhausted(self, key_id: str) -> bool:
+        """Returns true if no request must be sent for now"""
+        return self.remaining(key_id) == 0
+
+    def record(self, key_id: str, endpoint: str):
+        """Counts a request sent to an endpoint. Kept in memory until `flush`"""
+        if not self._daily_limit:
+            return
+        with self._lock:
+            counts = self._pending.setdefault(key_id, {})
+            counts[endpoint] = counts.get(endpoint, 0) + 1
+
+    def flush(self):
+        """Adds the requests counted by this invocation to the file"""
+        with self._lock:
+            if not self._pending:
+                return
+            ledger = self._load()
+            for key_id, pending_counts in self._pending.items():
+                counts = self._day(ledger, key_id)["counts"]
+                for endpoint, count in pending_counts.items():
+                    counts[endpoint] = counts.get(endpoint, 0) + count
+            self._save(ledger)
+            self._ledger = ledger
+            self._pending = {}
+
+    def block(self, key_id: str, duration: int):
+        """Stops the requests for a while, e.g. when the API answered 429 (Too Many Requests)
+
+        The block is saved at once, so the other processes stop their requests too.
+        :param key_id: The API key identifier (see `QuotaLedger.key_id`)
+        :param duration: Number of seconds no request is sent
+        """
+        with self._lock:
+            ledger = self._load()
+            self._day(ledger, key_id)["blocked_until"] = time.time() + duration
+            self._save(ledger)
+            self._ledger = ledger
+        self._logger.warning("API quota exceeded, serving cached data only for %ss", duration)
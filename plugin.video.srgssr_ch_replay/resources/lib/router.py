@@ -2,11 +2,13 @@
 
 from urllib.parse import urlencode
 
-import xbmcplugin
-
 
 class Router:
-    """Router dispatching the queries on the Addon"""
+    """Router dispatching the queries on the Addon
+
+    The router doesn't depend on Kodi: it only calls the plugin menus, so it can be used with
+    any object providing them.
+    """
     def __init__(self, plugin):
         self.plugin = plugin
 
@@ -23,16 +25,18 @@ class Router:
         """Dispatch to the plugin menu
         :param kwargs: url params
         """
-        self.plugin.logger.debug(f"Route dispatcher: kwargs: {kwargs}")
+        self.plugin.logger.debug("Route dispatcher: kwargs: %s", kwargs)
         if kwargs.get("bu"):
             self.plugin.bu = kwargs.get("bu")
         mode = kwargs.get("mode", "")
-        self.plugin.logger.debug(f"Mode: {mode}, BU:{self.plugin.bu}")
+        self.plugin.logger.debug("Mode: %s, BU:%s", mode, self.plugin.bu)
 
-        if not self.plugin.bu:
+        if mode == "purge_cache":
+            self.plugin.purge_cache()
+        elif not self.plugin.bu:
             self.plugin.bu_menu()
         else:
-            xbmcplugin.setPluginCategory(self.plugin.HANDLE, self.plugin.bu.upper())
+            self.plugin.set_category(self.plugin.bu.upper())
 
             if not mode:
                 self.plugin.main_menu()
@@ -49,12 +53,22 @@ class Router:
                     int(kwargs.get("current_page", 1)),
                     int(kwargs.get("number_of_episodes", 0)),
                     kwargs.get("next_page_id", ""),
+                    int(kwargs.get("offset", 0)),
                 )
             elif mode == "search":
-                self.plugin.search_menu(kwargs.get("type", ""))
+                self.plugin.search_menu(kwargs.get("type", ""), kwargs.get("all_bus") == "true")
+            elif mode == "search_videos":
+                self.plugin.search_videos(
+                    kwargs.get("query", ""),
+                    int(kwargs.get("current_page", 1)),
+                    kwargs.get("next_page_id", ""),
+                    int(kwargs.get("offset", 0)),
+                )
             elif mode == "trending":
                 self.plugin.trending(
-                    int(kwargs.get("current_page", 1)), kwargs.get("next_page_id", "")
+                    int(kwargs.get("current_page", 1)),
+                    kwargs.get("next_page_id", ""),
+                    int(kwargs.get("offset", 0)),
                 )
             elif mode == "list_episodes_by_show":
                 self.plugin.list_episodes_by_show(
@@ -62,8 +76,15 @@ class Router:
                     int(kwargs.get("current_page", 1)),
                     int(kwargs.get("number_of_episodes", 0)),
                     kwargs.get("next_page_id", ""),
+                    int(kwargs.get("offset", 0)),
+                )
+            elif mode == "jump_to_page":
+                url_args = {"tv_show_id": kwargs.get("tv_show_id", "")}
+                self.plugin.jump_to_page(
+                    kwargs["target_mode"], url_args, int(kwargs.get("number_of_episodes", 0))
                 )
             elif mode == "play_video":
                 video_id = kwargs.get("video_id", "")
                 media_id = kwargs.get("media_id", "")
-                self.plugin.play_video(video_id, media_id)
+                tv_show_id = kwargs.get("tv_show_id", "")
+                self.plugin.play_video(video_id, media_id, tv_show_id)
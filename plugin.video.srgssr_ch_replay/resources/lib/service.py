@@ -0,0 +1,270 @@
+"""Background service warming the plugin cache"""
+
+import json
+import time
+import traceback
+from urllib.parse import parse_qsl, quote, urlparse
+
+import xbmc
+import xbmcaddon
+
+from resources.lib.plugin import Plugin
+from resources.lib.srgssr_api_client import SRGSSRApiException
+
+
+class NextEpisodePreloader:
+    """Prepares the next episode of a show while an episode of the show ends
+
+    The plugin tells which episode it plays (see `Plugin.playing_episode`). Near the end of the
+    playback, the episode broadcast after it is resolved into the plugin cache, so playing it
+    doesn't wait for the API.
+    """
+
+    _REMAINING_TIME = 120  # Seconds before the end of the playback the next episode is prepared
+
+    def __init__(self):
+        self._player = xbmc.Player()
+        self._preloaded = None  # Media ID of the episode whose next episode was prepared
+
+    def is_playing(self) -> bool:
+        return self._player.isPlayingVideo()
+
+    def check(self, plugin: Plugin):
+        """Prepares the next episode if the playback of an episode of the plugin is ending"""
+        if (
+            not plugin.settings.preload_next_episode
+            or not plugin.cache.enabled
+            or not self.is_playing()
+        ):
+            return
+        playing = plugin.playing_episode()
+        if not playing or playing["media_id"] == self._preloaded:
+            return
+        try:
+            if self._player.getPlayingFile() != playing["url"]:
+                return  # Something else than the plugin's last episode is played
+            remaining = self._player.getTotalTime() - self._player.getTime()
+        except RuntimeError:
+            return  # The playback ended meanwhile
+        if remaining > self._REMAINING_TIME or plugin.video_client.quota_low:
+            return
+
+        self._preloaded = playing["media_id"]
+        plugin.bu = playing["bu"]
+        try:
+            episode = plugin.next_episode(playing["tv_show_id"], playing["video_id"])
+            media_list = (episode or {}).get("mediaList") or []
+            if not media_list:
+                plugin.logger.debug("No next episode after %s", playing["video_id"])
+                return
+            plugin.preload_video(episode.get("id"), media_list[0].get("id"))
+        except SRGSSRApiException as exc:
+            plugin.logger.warning("Preloading the next episode failed: %s", exc.message)
+        finally:
+            plugin.quota.flush()
+            plugin.metrics.finish(bu=plugin.bu, mode="preload_next_episode")
+
+
+class CacheWarmer(xbmc.Monitor):
+    """Service pre-fetching the default BU menus into the plugin cache while Kodi is idle
+
+    The topics, the TV Shows catalog, the trending videos and the first episodes page of the
+    favourite shows are fetched, up to a number of API requests per run. Optionally, the images
+    of these listings are loaded into Kodi's texture cache.
+
+    During a playback, the next episode of the played show is prepared (see
+    `NextEpisodePreloader`).
+    """
+
+    _CHECK_INTERVAL = 60  # Seconds between two checks whether the cache must be warmed
+    _PLAYBACK_CHECK_INTERVAL = 15  # Seconds between two checks during a playback
+    _MIN_IDLE_TIME = 60  # Seconds without user input before Kodi is considered idle
+    _MAX_PREWARMED_IMAGES = 60  # Images loaded into the texture cache per run
+
+    def __init__(self):
+        super().__init__()
+        self._addon_id = xbmcaddon.Addon().getAddonInfo("id")
+        self._last_run = 0
+        self._preloader = NextEpisodePreloader()
+
+    def run(self):
+        """Service main loop"""
+        while not self.abortRequested():
+            plugin = None
+            try:
+                plugin = Plugin(handle=-1)
+                if self._must_warm(plugin):
+                    self._last_run = time.time()
+                    self.warm(plugin)
+            except Exception:  # pylint: disable=broad-except
+                # The service runs until Kodi stops: a failed run is logged and tried again later
+                self._log_exception("Cache warming failed")
+            if plugin is not None:
+                try:
+                    self._preloader.check(plugin)
+                except Exception:  # pylint: disable=broad-except
+                    self._log_exception("Preloading the next episode failed")
+            interval = self._CHECK_INTERVAL
+            if self._preloader.is_playing():
+                interval = self._PLAYBACK_CHECK_INTERVAL
+            if self.waitForAbort(interval):
+                break
+
+    def _must_warm(self, plugin: Plugin) -> bool:
+        settings = plugin.settings
+        return (
+            settings.enable_cache_warming
+            and plugin.cache.enabled
+            and plugin.bu
+            and settings.consumerKey
+            and settings.consumerSecret
+            and self._last_run + settings.cache_warming_interval * 60 < time.time()
+            and xbmc.getGlobalIdleTime() >= self._MIN_IDLE_TIME
+            and not xbmc.Player().isPlaying()
+            and not plugin.video_client.quota_low
+        )
+
+    def warm(self, plugin: Plugin):
+        """Fetches the default BU menus until the request budget is spent"""
+        plugin.logger.debug(
+            "Warming the cache of %s (API requests left today: %s)",
+            plugin.bu,
+            plugin.video_client.remaining_requests,
+        )
+        # Fresh data is wanted, not the stale cache entries
+        plugin.stale_while_revalidate = False
+        only_active_shows = not plugin.settings.show_inactive_shows
+
+        # The listings are requested like the plugin does, so the same cache entries are warmed
+        tasks = [
+            (plugin.video_client.get_topics, (plugin.bu,)),
+            (plugin.get_show_catalog, (only_active_shows,)),
+            (plugin.run_background_tasks, ()),  # Refreshes the catalog if outdated
+            (self._first_page, (plugin, plugin.bu, "trending", {})),
+        ]
+        for bu, tv_show_id in self._favourite_shows(plugin):
+            tasks.append(
+                (
+                    self._first_page,
+                    (plugin, bu or plugin.bu, "list_episodes_by_show", {"tv_show_id": tv_show_id}),
+                )
+            )
+
+        budget = plugin.settings.cache_warming_budget
+        responses = []
+        for func, args in tasks:
+            if self._requests_count(plugin) >= budget or self.abortRequested():
+                plugin.logger.debug("Cache warming stopped, request budget spent")
+                break
+            try:
+                responses.append(func(*args))
+            except SRGSSRApiException as exc:
+                plugin.logger.warning("Cache warming failed: %s", exc.message)
+                break
+
+        if plugin.settings.prewarm_artwork:
+            with plugin.metrics.span("artwork"):
+                self._prewarm_artwork(plugin, responses)
+        plugin.quota.flush()
+        plugin.metrics.finish(bu=plugin.bu, mode="cache_warming")
+
+    @staticmethod
+    def _first_page(plugin: Plugin, bu: str, url_mode: str, url_args: dict) -> dict:
+        """Returns the first page of a paged listing of a BU"""
+        default_bu, plugin.bu = plugin.bu, bu
+        try:
+            page, _ = plugin.get_page(url_mode, url_args, 1, "")
+        finally:
+            plugin.bu = default_bu
+        return page
+
+    @staticmethod
+    def _artwork(plugin: Plugin, responses: list) -> list:
+        """Returns the image URLs of the warmed listings, as the plugin sets them on the items"""
+        images = []
+        for response in responses:
+            if not isinstance(response, dict):
+                continue
+            for topic in response.get("topicList") or []:
+                images.append(("thumb", topic.get("imageUrl")))
+            show = response.get("show") or {}
+            for episode in response.get("episodeList") or []:
+                media = (episode.get("mediaList") or [{}])[0]
+                images += [("thumb", media.get("imageUrl")), ("fanart", show.get("imageUrl"))]
+            for media in response.get("mediaList") or []:
+                media_show = media.get("show") or {}
+                images += [("thumb", media.get("imageUrl")), ("fanart", media_show.get("imageUrl"))]
+
+        urls = []
+        for art_type, image_url in images:
+            url = plugin.artwork.url(art_type, image_url)
+            if url and url not in urls:
+                urls.append(url)
+        return urls
+
+    def _prewarm_artwork(self, plugin: Plugin, responses: list):
+        """Loads the images of the warmed listings into Kodi's texture cache
+
+        Kodi caches an image when it is requested through its web server, which must be enabled.
+        """
+        webserver = {}
+        for name in ("webserver", "webserverport", "webserverusername", "webserverpassword"):
+            response = self._jsonrpc("Settings.GetSettingValue", {"setting": f"services.{name}"})
+            webserver[name] = response.get("result", {}).get("value")
+        if not webserver["webserver"]:
+            plugin.logger.debug("Kodi web server disabled, the artwork isn't pre-warmed")
+            return
+
+        from requests import RequestException  # pylint: disable=import-outside-toplevel
+
+        auth = (webserver["webserverusername"], webserver["webserverpassword"])
+        for url in self._artwork(plugin, responses)[: self._MAX_PREWARMED_IMAGES]:
+            if self.abortRequested():
+                break
+            download = self._jsonrpc(
+                "Files.PrepareDownload", {"path": f"image://{quote(url, safe='')}/"}
+            )
+            path = download.get("result", {}).get("details", {}).get("path")
+            if not path:
+                continue
+            try:
+                plugin.video_client.session.get(
+                    f"http://127.0.0.1:{webserver['webserverport']}/{path}",
+                    auth=auth,
+                    timeout=plugin.timeout,
+                )
+            except RequestException as exc:
+                plugin.logger.warning("Artwork pre-warming failed: %s", exc)
+                break
+
+    def _log_exception(self, message: str):
+        """Logs the exception being handled with its traceback"""
+        xbmc.log(f"[{self._addon_id}]: {message}\n{traceback.format_exc()}", xbmc.LOGERROR)
+
+    @staticmethod
+    def _requests_count(plugin: Plugin) -> int:
+        return sum(1 for span in plugin.metrics.spans if span["name"] == "http")
+
+    @staticmethod
+    def _jsonrpc(method: str, params: dict) -> dict:
+        """Calls a Kodi JSON-RPC method and returns its response"""
+        request = {"jsonrpc": "2.0", "id": 1, "method": method, "params": params}
+        return json.loads(xbmc.executeJSONRPC(json.dumps(request)))
+
+    def _favourite_shows(self, plugin: Plugin) -> list:
+        """Returns the (bu, tv_show_id) of the plugin's shows in the Kodi favourites"""
+        response = self._jsonrpc(
+            "Favourites.GetFavourites", {"properties": ["path", "windowparameter"]}
+        )
+        favourites = response.get("result", {}).get("favourites") or []
+
+        shows = []
+        for favourite in favourites:
+            url = favourite.get("windowparameter") or favourite.get("path") or ""
+            parsed_url = urlparse(url)
+            if parsed_url.netloc != plugin.ADDON_ID:
+                continue
+            params = dict(parse_qsl(parsed_url.query))
+            if params.get("mode") == "list_episodes_by_show" and params.get("tv_show_id"):
+                shows.append((params.get("bu", ""), params["tv_show_id"]))
+        return shows
@@ -1,12 +1,98 @@
-import xbmcaddon
+from resources.lib.utils import to_bool
 
 
 class Settings:
-    """Wrapper of the XBMC settings"""
+    """Read-once snapshot of the XBMC settings
+
+    The known settings are read together on first access and converted to their type. Writes
+    are passed through to XBMC and update the snapshot. Outside Kodi, any object providing
+    getSetting and setSetting can be given as addon.
+    """
+
+    # Typed settings: name -> (type, default value, minimum for integers)
+    _SCHEMA = {
+        "consumerKey": (str, "", None),
+        "consumerSecret": (str, "", None),
+        "enable_subtitles": (bool, False, None),
+        "consumerKeySubtitles": (str, "", None),
+        "consumerSecretSubtitles": (str, "", None),
+        "default_bu": (str, "choose", None),
+        "number_of_episodes_per_page": (int, 10, 1),
+        "enable_inputstream_adaptive": (bool, True, None),
+        "scale_artwork": (bool, True, None),
+        "enable_cache": (bool, True, None),
+        "cache_size": (int, 50, 1),
+        "stale_while_revalidate": (bool, True, None),
+        "connect_timeout": (int, 5, 1),
+        "read_timeout": (int, 15, 1),
+        "circuit_breaker_cooldown": (int, 60, 0),
+        "max_retries": (int, 2, 0),
+        "daily_request_quota": (int, 0, 0),
+        "prefetch_next_page": (bool, True, None),
+        "prefetch_subtitles": (bool, False, None),
+        "preload_next_episode": (bool, True, None),
+        "enable_cache_warming": (bool, False, None),
+        "cache_warming_interval": (int, 60, 5),
+        "cache_warming_budget": (int, 20, 1),
+        "prewarm_artwork": (bool, False, None),
+        "show_inactive_shows": (bool, False, None),
+        "enable_metrics_file": (bool, False, None),
+    }
+
+    def __init__(self, addon=None):
+        """
+        :param addon: The xbmcaddon.Addon to read from. A new one is created if not given
+        """
+        object.__setattr__(self, "_addon", addon)
+        object.__setattr__(self, "_values", None)
+
+    def _load(self):
+        """Reads and converts all the known settings"""
+        if self._addon is None:
+            import xbmcaddon  # pylint: disable=import-outside-toplevel
+
+            object.__setattr__(self, "_addon", xbmcaddon.Addon())
+        values = {}
+        for name in self._SCHEMA:
+            values[name] = self._parse(name, self._addon.getSetting(name))
+        object.__setattr__(self, "_values", values)
+
+    def _parse(self, name: str, value: str):
+        """Converts a raw setting value to its type, falling back to the default if invalid"""
+        if name not in self._SCHEMA:
+            return value
+
+        setting_type, default, minimum = self._SCHEMA[name]
+        try:
+            if setting_type is bool:
+                return to_bool(value)
+            if setting_type is int:
+                value = int(value)
+                return value if value >= minimum else default
+        except ValueError:
+            return default
+        return value
+
+    def reload(self):
+        """Discards the snapshot, e.g. after the settings dialog has been opened"""
+        import xbmcaddon  # pylint: disable=import-outside-toplevel
+
+        object.__setattr__(self, "_addon", xbmcaddon.Addon())
+        object.__setattr__(self, "_values", None)
+
     def __getattr__(self, name):
-        return xbmcaddon.Addon().getSetting(name)
+        if self._values is None:
+            self._load()
+        if name not in self._values:
+            self._values[name] = self._parse(name, self._addon.getSetting(name))
+        return self._values[name]
 
     def __setattr__(self, name, value):
-        if value is not None:
+        if self._values is None:
+            self._load()
+        self._values[name] = value
+        if isinstance(value, bool):
+            value = str(value).lower()
+        elif value is not None:
             value = str(value)
-        xbmcaddon.Addon().setSetting(name, value)
+        self._addon.setSetting(name, value)
@@ -1,3 +1,8 @@
-from .srgssr_api_client import InvalidCredentialsException
+from .srgssr_api_client import (
+    SRGSSRApiException,
+    InvalidCredentialsException,
+    CircuitOpenException,
+    QuotaExceededException,
+)
 from .srgssr_video_api_client import SRGSSRVideoApiClient
 from .srgssr_subtitles_api_client import SRGSSRSubtitlesApiClient
@@ -0,0 +1,52 @@
+"""Incremental decoding of the JSON API responses"""
+
+import codecs
+import json
+
+_DECODER = json.JSONDecoder()
+_SEPARATORS = " \t\n\r,"
+
+
+def iter_array_items(chunks, key: str):
+    """Yields the items of an array of a JSON document while the document is received
+
+    Only the array of the first occurrence of the key is read, and its items are expected to be
+    objects, as in the API list responses. The items are decoded one by one, so neither the whole
+    document text nor its other values are held in memory.
+    :param chunks: Iterable of the bytes of the UTF-8 JSON document
+    :param key: The key of the array
+    :raise ValueError if the document ends before the end of the array
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    marker = f'"{key}"'
+    buffer = ""
+    position = None  # Position of the next item in the buffer, once the array is reached
+    for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        if position is None:
+            start = buffer.find(marker)
+            bracket = buffer.find("[", start + len(marker)) if start >= 0 else -1
+            if bracket < 0:
+                if start < 0:
+                    # Keeping the end of the buffer, in case the key is split between chunks
+                    buffer = buffer[-len(marker) :]
+                continue
+            position = bracket + 1
+
+        while True:
+            while position < len(buffer) and buffer[position] in _SEPARATORS:
+                position += 1
+            if position >= len(buffer):
+                break
+            if buffer[position] == "]":
+                return
+            try:
+                item, position = _DECODER.raw_decode(buffer, position)
+            except ValueError:
+                break  # The item isn't completely received yet
+            yield item
+        buffer = buffer[position:]
+        position = 0
+
+    if position is not None:
+        raise ValueError(f"The JSON document ends in the {key} array")
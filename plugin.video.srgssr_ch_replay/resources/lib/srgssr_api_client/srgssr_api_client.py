@@ -1,9 +1,20 @@
 """SRGSSR Base API Client"""
 
+import os
+import random
+import re
+import threading
+import time
 from datetime import datetime, timedelta
-import requests
-from requests.auth import HTTPBasicAuth
-from requests import Response
+from typing import TYPE_CHECKING
+
+from ..quota import QuotaLedger
+from ..token_store import TokenStore
+from .json_stream import iter_array_items
+
+# requests is slow to import and only needed once a request is sent: it's imported on first use
+if TYPE_CHECKING:
+    from requests import Response
 
 
 class SRGSSRApiException(Exception):
@@ -18,15 +29,38 @@ class InvalidCredentialsException(SRGSSRApiException):
 
 
 class InvalidTokenException(SRGSSRApiException):
+    def __init__(self, api_name: str, message: str, token: str = None):
+        super().__init__(api_name, message)
+        self.token = token  # The token rejected by the API, if known
+
+
+class QuotaExceededException(SRGSSRApiException):
+    pass
+
+
+class CircuitOpenException(SRGSSRApiException):
     pass
 
 
 class SRGSSRApiClient:
-    """SRGSSR API Client Base Class"""
+    """SRGSSR API Client Base Class
+
+    The client doesn't depend on Kodi. The plugin object it's given must provide logger,
+    settings, profile_path, timeout, cache, metrics, circuit_breaker, quota,
+    stale_while_revalidate and add_background_task.
+    """
 
     _VERSION = None  # The API version (e.g. "v1")
     _API_NAME = None  # The API name (e.g. Video, Subtitles)
     _API_URL_NAME = None  # The API URL name (present in the API URL, e.g. videometadata)
+    _CACHE_TTLS = {}  # Cache duration in seconds by path prefix. Paths without prefix aren't cached
+    _TOKEN_REFRESH_MARGIN = 300  # Seconds before its expiration a token is renewed
+    _POOL_SIZE = 10  # Connections kept per host, enough for the concurrent requests
+    _RETRY_STATUSES = (500, 502, 503, 504)  # Statuses of the GET requests worth retrying
+    _RETRY_BACKOFF = 0.5  # Seconds, doubled on each retry, from which the retry delay is drawn
+    _QUOTA_BLOCK_DURATION = 15 * 60  # Seconds without requests after a 429 without Retry-After
+    _STREAM_CHUNK_SIZE = 64 * 1024  # Bytes read at once from the streamed responses
+    _ENDPOINT_SEGMENT = re.compile(r"[A-Za-z_]+")  # Path segments which aren't IDs
 
     def __init__(self, base_url: str, creds: dict, plugin, verify: bool = True):
         """API Client creation
@@ -40,12 +74,22 @@ class SRGSSRApiClient:
             raise ValueError("SRGSSRApiClient creds must contain a 'key' and 'secret' fields")
 
         self._base_url = base_url
-        self._basic_auth = HTTPBasicAuth(creds.get("key"), creds.get("secret"))
+        self._basic_auth = (creds.get("key"), creds.get("secret"))
         self._verify = verify
         self._plugin = plugin
         self._logger = self._plugin.logger
-        self._session = requests.Session()
-        self._auth_token = self.get_auth_token()
+        self._session = None
+        self._timeout = plugin.timeout
+        self._max_retries = plugin.settings.max_retries
+        self._auth_token = None  # Acquired on the first request
+        # The client may be used by several threads (e.g. search in all the BUs)
+        self._auth_token_lock = threading.Lock()
+        self._token_store = TokenStore(
+            os.path.join(plugin.profile_path, f"token_{self.api_name.lower()}"),
+            self._logger,
+            sum(self._timeout),
+        )
+        self._quota_key = QuotaLedger.key_id(creds.get("key"))
 
     @property
     def version(self):
@@ -71,33 +115,89 @@ class SRGSSRApiClient:
             )
         return self._API_URL_NAME
 
+    @property
+    def remaining_requests(self):
+        """Number of requests left today with the API key, or None if there is no limit"""
+        return self._plugin.quota.remaining(self._quota_key)
+
+    @property
+    def quota_low(self) -> bool:
+        """True if the API key quota is nearly spent: only the necessary requests should be sent"""
+        return self._plugin.quota.is_low(self._quota_key)
+
+    def _check_quota(self):
+        """Raises an exception if no request must be sent with the API key for now"""
+        if self._plugin.quota.is_exhausted(self._quota_key):
+            raise QuotaExceededException(self.api_name, "API quota exceeded")
+
+    def _record_request(self, endpoint: str, res: "Response" = None):
+        """Counts a request in the quota ledger, and stops the requests if it was rejected"""
+        quota = self._plugin.quota
+        quota.record(self._quota_key, endpoint)
+        if res is not None and res.status_code == 429:
+            retry_after = res.headers.get("Retry-After", "")
+            quota.block(
+                self._quota_key,
+                int(retry_after) if retry_after.isdigit() else self._QUOTA_BLOCK_DURATION,
+            )
+
     def get_auth_token(self) -> str:
         """Returning the authorization token
 
-        Trying to get the auth token from the plugin settings. If it doesn't
-        exists, request a new one
+        Trying to get the auth token shared by the plugin processes. If it doesn't
+        exist or expires soon, a single process requests a new one
         """
-        token_exp = getattr(self._plugin.settings, f"srgssr_{self.api_name}_token_exp")
-        if token_exp:
-            token_exp = datetime.fromisoformat(token_exp)
-            token = getattr(self._plugin.settings, f"srgssr_{self.api_name}_token")
-            if token and (token_exp > datetime.utcnow()):
-                self._logger.debug(f"Using cached AuthToken (valid until {token_exp})")
+        token = self._token_store.get(self._TOKEN_REFRESH_MARGIN)
+        if token:
+            self._logger.debug("Using cached AuthToken")
+            return token
+
+        with self._token_store.lock():
+            # Another process may have renewed the token while this one was waiting for the lock
+            token = self._token_store.get(self._TOKEN_REFRESH_MARGIN)
+            if token:
+                self._logger.debug("Using AuthToken renewed by another process")
                 return token
+            return self.request_new_token()
 
-        # Token doesn't exist or no more valid
-        return self.request_new_token()
+    def renew_auth_token(self, rejected_token: str = None):
+        """Replaces a token rejected by the API
+
+        A new token is only requested if no other thread or process has replaced the rejected
+        token yet, so concurrent requests rejected together trigger a single renewal.
+        :param rejected_token: The token sent with the rejected request. The current token if
+                               not given
+        """
+        with self._auth_token_lock:
+            if rejected_token is None:
+                rejected_token = self._auth_token
+            elif self._auth_token != rejected_token:
+                self._logger.debug("Using AuthToken renewed by another thread")
+                return
+            with self._token_store.lock():
+                token = self._token_store.get()
+                if token and token != rejected_token:
+                    self._logger.debug("Using AuthToken renewed by another process")
+                    self._auth_token = token
+                else:
+                    self.request_new_token()
 
     def request_new_token(self) -> str:
-        """Requests a new AccessToken to the API using the credentials"""
+        """Requests a new AccessToken to the API using the credentials
+
+        Must be called holding the token store lock
+        """
         self._logger.debug("Requesting new AuthToken")
 
+        self._check_quota()
         params = {"grant_type": "client_credentials"}
-        res = requests.post(
+        res = self.session.post(
             f"{self._base_url}/oauth/v1/accesstoken",
             params=params,
             auth=self._basic_auth,
+            timeout=self._timeout,
         )
+        self._record_request("oauth", res)
         if res.status_code in [401, 403]:
             raise InvalidCredentialsException(self.api_name, "Invalid key/secret to access the API")
         if not res.ok:
@@ -107,10 +207,9 @@ class SRGSSRApiClient:
         token = data["access_token"]
         expires_in = data["expires_in"]
         token_exp = (datetime.utcnow() + timedelta(seconds=expires_in)).isoformat()
-        self._logger.debug(f"Got a new AuthToken valid until {token_exp}")
-
-        setattr(self._plugin.settings, f"srgssr_{self.api_name}_token", token)
-        setattr(self._plugin.settings, f"srgssr_{self.api_name}_token_exp", token_exp)
+        self._logger.debug("Got a new AuthToken valid until %s", token_exp)
+        self._auth_token = token
+        self._token_store.set(token, expires_in)
 
         return token
 
@@ -121,25 +220,179 @@ class SRGSSRApiClient:
         def wrapper(self, *args, **kwargs):
             try:
                 return func(self, *args, **kwargs)
-            except InvalidTokenException:
+            except InvalidTokenException as exc:
                 # Invoke the code responsible for get a new token
-                self.request_new_token()
+                self.renew_auth_token(exc.token)
 
                 # once the token is refreshed, we can retry the operation
                 return func(self, *args, **kwargs)
 
         return wrapper
 
-    def _handle_response(self, res: Response) -> dict:
+    def _handle_response(self, res: "Response") -> dict:
         """Errors handling + returning json response"""
         if res.status_code in [401, 403]:
-            self._logger.error(f"Error{res.status_code}: Invalid token. {res.content}")
-            raise InvalidTokenException(self.api_name, "Invalid Auth Token")
+            self._logger.error("Error%s: Invalid token. %s", res.status_code, res.content)
+            authorization = res.request.headers.get("Authorization", "") if res.request else ""
+            raise InvalidTokenException(
+                self.api_name, "Invalid Auth Token", authorization[len("Bearer ") :] or None
+            )
         if not res.ok:
             msg = f"Error{res.status_code}: {res.content}"
             self._logger.error(msg)
             raise SRGSSRApiException(self.api_name, msg)
-        return res.json()
+        with self._plugin.metrics.span("json"):
+            return res.json()
+
+    def _compact_response(self, data: dict) -> dict:
+        """Returns a cacheable response reduced to what the plugin uses. Kept whole by default"""
+        return data
+
+    def _compact_item(self, items_key: str, item: dict) -> dict:
+        """Returns an item of a streamed list reduced to what the plugin uses. Kept whole by
+        default
+        """
+        return item
+
+    def _fetch(self, path: str, params: dict) -> dict:
+        """Requests a cacheable response and returns it compacted
+        :param path: The API path
+        :param params: The request parameters
+        """
+        return self._compact_response(self._handle_response(self._get(path, params=params)))
+
+    def _fetch_items(self, path: str, params: dict, items_key: str):
+        """Requests a list response and returns an iterator of its compacted items, decoded while
+        the response is downloaded (see `_stream_items`)
+
+        The request is sent, and its errors raised, before the iterator is returned, so the
+        access token can be renewed by `_renew_access_token`. The response isn't cached.
+        :param path: The API path
+        :param params: The request parameters
+        :param items_key: The key of the list of items read from the response
+        """
+        res = self._get(path, params=params, stream=True)
+        if not res.ok:
+            with res:
+                self._handle_response(res)  # Raises the API error
+
+        def items():
+            with res:
+                yield from self._stream_items(res, path, items_key)
+
+        return items()
+
+    def _fetch_if_changed(self, path: str, params: dict, items_key: str, validators: dict) -> tuple:
+        """Conditional request of a list response, decoded while it is downloaded (see
+        `_stream_items`)
+        :param path: The API path
+        :param params: The request parameters
+        :param items_key: The key of the list of items read from the response
+        :param validators: The etag and last_modified of the known response, if any
+        :return: The compacted items, or None if they didn't change, and the new validators
+        """
+        headers = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+        with self._get(path, params=params, stream=True, headers=headers) as res:
+            if res.status_code == 304:
+                self._logger.debug("Not modified: %s %s", path, params)
+                return None, validators
+            items = list(self._stream_items(res, path, items_key))
+            new_validators = {
+                "etag": res.headers.get("ETag", ""),
+                "last_modified": res.headers.get("Last-Modified", ""),
+            }
+        return items, new_validators
+
+    def _stream_items(self, res: "Response", path: str, items_key: str):
+        """Yields the compacted items of a streamed list response while it is downloaded
+
+        The response text and the whole decoded response are never held in memory, which
+        matters for the large responses (e.g. all the TV Shows of a BU).
+        """
+        from requests import RequestException  # pylint: disable=import-outside-toplevel
+
+        if not res.ok:
+            self._handle_response(res)  # Raises the API error
+
+        with self._plugin.metrics.span("json", path=path, stream=True, bytes=0) as span:
+
+            def chunks():
+                for chunk in res.iter_content(self._STREAM_CHUNK_SIZE):
+                    span["bytes"] += len(chunk)
+                    yield chunk
+
+            try:
+                for item in iter_array_items(chunks(), items_key):
+                    yield self._compact_item(items_key, item)
+            except (ValueError, RequestException) as exc:
+                raise SRGSSRApiException(
+                    self.api_name, f"Invalid response from {path}: {exc}"
+                ) from exc
+
+    def _cache_ttl(self, path: str) -> int:
+        """Returns the cache duration of a path (0 if it must not be cached)"""
+        prefixes = [prefix for prefix in self._CACHE_TTLS if path.startswith(prefix)]
+        if not prefixes:
+            return 0
+        return self._CACHE_TTLS[max(prefixes, key=len)]
+
+    def _cached_get(self, path: str, params: dict = None) -> dict:
+        """GET request whose json response is served from the plugin cache when possible
+        :param path: The API path
+        :param params: The request parameters
+        """
+        cache = self._plugin.cache
+        ttl = self._cache_ttl(path)
+        if not ttl:
+            return self._handle_response(self._get(path, params=params))
+
+        key = cache.key(self.api_name, path, params)
+        with self._plugin.metrics.span("cache", path=path) as span:
+            data = cache.get(key)
+            span["hit"] = data is not None
+        if data is not None:
+            self._logger.debug("Cache hit: %s %s", path, params)
+            return data
+
+        stale_data = cache.get_stale(key)
+        if stale_data is not None and self.quota_low:
+            self._logger.debug("API quota low, serving stale data: %s %s", path, params)
+            return stale_data
+        if stale_data is not None and self._plugin.stale_while_revalidate:
+            self._logger.debug("Serving stale data, refreshing in background: %s %s", path, params)
+            self._plugin.add_background_task(self._refresh_cache, path, params, key, ttl)
+            return stale_data
+
+        try:
+            data = self._fetch(path, params)
+        except InvalidTokenException:
+            raise
+        except SRGSSRApiException:
+            if stale_data is None:
+                raise
+            self._logger.warning("API unavailable, serving stale data: %s %s", path, params)
+            return stale_data
+
+        cache.set(key, data, ttl)
+        return data
+
+    def _refresh_cache(self, path: str, params: dict, key: str, ttl: int):
+        """Fetches a response again and updates its cache entry"""
+        try:
+            try:
+                data = self._fetch(path, params)
+            except InvalidTokenException as exc:
+                self.renew_auth_token(exc.token)
+                data = self._fetch(path, params)
+        except SRGSSRApiException as exc:
+            self._logger.warning("Background refresh of %s failed: %s", path, exc.message)
+            return
+        self._plugin.cache.set(key, data, ttl)
 
     def _url(self, path: str) -> str:
         """Constructs the API url"""
@@ -147,6 +400,9 @@ class SRGSSRApiClient:
 
     @property
     def _headers(self) -> dict:
+        with self._auth_token_lock:
+            if self._auth_token is None:
+                self._auth_token = self.get_auth_token()
         return {
             "accept": "application/json",
             "Authorization": f"Bearer {self._auth_token}",
@@ -154,17 +410,97 @@ class SRGSSRApiClient:
 
     # =============================== Generic http methods ==============================
 
-    def _get(self, path: str, **kwargs) -> Response:
+    def _get(self, path: str, **kwargs) -> "Response":
         return self._generic_http_method_request("get", path, **kwargs)
 
-    def _post(self, path: str, **kwargs) -> Response:
+    def _post(self, path: str, **kwargs) -> "Response":
         return self._generic_http_method_request("post", path, **kwargs)
 
-    def _generic_http_method_request(self, method: str, path: str, **kwargs) -> Response:
-        http_method = getattr(self._session, method)
-        return http_method(
-            self._url(path),
-            **kwargs,
-            verify=self._verify,
-            headers=self._headers,
-        )
+    @property
+    def session(self):
+        """The HTTP session, created on first use
+
+        Its pooled connections are reused by all the requests of the client, including the
+        token requests, so a single TLS handshake is done per host.
+        """
+        if self._session is None:
+            # pylint: disable=import-outside-toplevel
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self._POOL_SIZE, pool_maxsize=self._POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            self._session = session
+        return self._session
+
+    def _endpoint(self, path: str) -> str:
+        """Returns the name of the endpoint of a path, the circuit breaker and quota key
+
+        The segments of the path which aren't plain words (IDs, URNs) are replaced, so all the
+        videos share the `Video:{id}/mediaComposition` endpoint.
+        :param path: The path of the request, relative to the API URL
+        """
+        segments = [
+            segment if self._ENDPOINT_SEGMENT.fullmatch(segment) else "{id}"
+            for segment in path.split("/")
+        ]
+        return f"{self.api_name}:{'/'.join(segments)}"
+
+    def _generic_http_method_request(self, method: str, path: str, **kwargs) -> "Response":
+        from requests import RequestException  # pylint: disable=import-outside-toplevel
+
+        self._check_quota()
+        circuit_breaker = self._plugin.circuit_breaker
+        endpoint = self._endpoint(path)
+        if circuit_breaker.is_open(endpoint):
+            raise CircuitOpenException(self.api_name, f"Circuit open for {endpoint}")
+
+        headers = {**self._headers, **kwargs.pop("headers", {})}
+        http_method = getattr(self.session, method)
+        # Only the idempotent requests are retried
+        attempts = 1 + (self._max_retries if method == "get" else 0)
+        res = None
+        error = None
+        for attempt in range(attempts):
+            if res is not None:
+                # Releases the connection of the failed attempt (not read if streamed) to the pool
+                res.close()
+            if attempt:
+                # Exponential backoff with full jitter, so concurrent retries are spread
+                delay = random.uniform(0, self._RETRY_BACKOFF * 2**attempt)
+                self._logger.debug("Retrying %s %s in %.2fs", method, path, delay)
+                time.sleep(delay)
+
+            with self._plugin.metrics.span(
+                "http", method=method, path=path, attempt=attempt
+            ) as span:
+                try:
+                    res = http_method(
+                        self._url(path),
+                        **kwargs,
+                        verify=self._verify,
+                        headers=headers,
+                        timeout=self._timeout,
+                    )
+                except RequestException as exc:
+                    self._record_request(endpoint)
+                    span["error"] = str(exc)
+                    res, error = None, exc
+                    continue
+                span["status"] = res.status_code
+                if not kwargs.get("stream"):
+                    span["bytes"] = len(res.content)
+            self._record_request(endpoint, res)
+            if res.status_code not in self._RETRY_STATUSES:
+                break
+
+        if res is None:
+            circuit_breaker.record_failure(endpoint)
+            raise SRGSSRApiException(self.api_name, f"Request to {path} failed: {error}") from error
+        if res.status_code >= 500:
+            circuit_breaker.record_failure(endpoint)
+        else:
+            circuit_breaker.record_success(endpoint)
+        return res
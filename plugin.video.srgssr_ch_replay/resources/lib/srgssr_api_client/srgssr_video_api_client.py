@@ -9,6 +9,75 @@ class SRGSSRVideoApiClient(SRGSSRApiClient):
     _VERSION = "v2"
     _API_NAME = "Video"
     _API_URL_NAME = "videometadata"
+    _CACHE_TTLS = {
+        "tv_shows": 6 * 3600,
+        "tv_topics": 12 * 3600,
+        "latest_episodes": 15 * 60,
+        "latest_topics": 15 * 60,
+        "trending_picks": 10 * 60,
+        "most_clicked": 10 * 60,
+        "search": 30 * 60,
+    }
+    # Fields of the objects used by the plugin. The other ones are dropped before the responses
+    # are cached, so they are neither kept in memory nor decoded again on cache hits
+    _FIELDS = {
+        "show": ("id", "urn", "title", "description", "lead", "imageUrl", "numberOfEpisodes"),
+        "episode": ("id", "urn", "title", "publishedDate", "mediaList"),
+        "media": ("id", "urn", "title", "description", "imageUrl", "duration", "show", "episode"),
+        "topic": ("id", "urn", "title", "imageUrl"),
+    }
+    # Kind of the objects held by the response keys and the object fields
+    _KINDS = {
+        "showList": "show",
+        "searchResultListShow": "show",
+        "show": "show",
+        "episodeList": "episode",
+        "episode": "episode",
+        "mediaList": "media",
+        "searchResultListMedia": "media",
+        "topicList": "topic",
+    }
+
+    def _compact_response(self, data: dict) -> dict:
+        """Returns the response with only its objects and the next page reference, reduced to the
+        fields used by the plugin
+        """
+        compacted = {"next": data["next"]} if "next" in data else {}
+        for key, value in data.items():
+            if key in self._KINDS:
+                compacted[key] = self._compact(self._KINDS[key], value)
+        return compacted
+
+    def _compact_item(self, items_key: str, item: dict) -> dict:
+        if items_key not in self._KINDS:
+            return item
+        return self._compact(self._KINDS[items_key], item)
+
+    def _compact(self, kind: str, value):
+        """Reduces an object, or a list of objects, of a kind to its used fields"""
+        if isinstance(value, list):
+            return [self._compact(kind, item) for item in value]
+        if not isinstance(value, dict):
+            return value
+
+        compacted = {}
+        for field in self._FIELDS[kind]:
+            if field in value:
+                field_value = value[field]
+                if field in self._KINDS:
+                    field_value = self._compact(self._KINDS[field], field_value)
+                compacted[field] = field_value
+        return compacted
+
+    @staticmethod
+    def _tv_shows_params(bu: str, character_filter: str, only_active_shows: bool) -> dict:
+        """Returns the parameters of a request of all the TV Shows, or of those of a letter"""
+        return {
+            "bu": bu,
+            "characterFilter": character_filter,
+            "onlyActiveShows": only_active_shows,
+            "pageSize": "unlimited",  # Getting all the shows
+        }
 
     @SRGSSRApiClient._renew_access_token
     def get_tv_shows(
@@ -24,26 +93,41 @@ class SRGSSRVideoApiClient(SRGSSRApiClient):
         :param string_filter: Returning TV Shows matching this string
         :param only_active_shows: If true, only returns the active shows
         """
-        params = {
-            "bu": bu,
-        }
-
         url = "tv_shows"
 
         if string_filter:
-            params.update({"q": string_filter})
+            params = {"bu": bu, "q": string_filter}
         else:
-            params.update(
-                {
-                    "characterFilter": character_filter,
-                    "onlyActiveShows": only_active_shows,
-                    "pageSize": "unlimited",  # Getting all the shows
-                }
-            )
+            params = self._tv_shows_params(bu, character_filter, only_active_shows)
             url += "/alphabetical"
 
-        resp = self._get(url, params=params)
-        return self._handle_response(resp)
+        return self._cached_get(url, params=params)
+
+    @SRGSSRApiClient._renew_access_token
+    def iter_tv_shows(self, bu: str, character_filter: str = "", only_active_shows: bool = True):
+        """Returns an iterator of the TV Shows, yielding them while they are downloaded
+
+        The shows aren't cached: used when the cache is disabled, so the whole response is never
+        held in memory and the shows are decoded while the rest of it is received.
+        :param bu: Business Unit (either 'srf', 'rtr', 'swi', 'rts', 'rsi')
+        :param character_filter: First letter of the shows. If not speficied, returns all the shows
+        :param only_active_shows: If true, only returns the active shows
+        """
+        params = self._tv_shows_params(bu, character_filter, only_active_shows)
+        return self._fetch_items("tv_shows/alphabetical", params, "showList")
+
+    @SRGSSRApiClient._renew_access_token
+    def get_tv_shows_if_changed(
+        self, bu: str, only_active_shows: bool = True, validators: dict = None
+    ) -> tuple:
+        """Fetching all the TV Shows, unless they didn't change
+        :param bu: Business Unit (either 'srf', 'rtr', 'swi', 'rts', 'rsi')
+        :param only_active_shows: If true, only returns the active shows
+        :param validators: The HTTP validators returned with the known TV Shows list
+        :return: The TV Shows list, or None if it didn't change, and its HTTP validators
+        """
+        params = self._tv_shows_params(bu, "", only_active_shows)
+        return self._fetch_if_changed("tv_shows/alphabetical", params, "showList", validators or {})
 
     @SRGSSRApiClient._renew_access_token
     def get_topics(self, bu: str) -> dict:
@@ -51,8 +135,7 @@ class SRGSSRVideoApiClient(SRGSSRApiClient):
         :param bu: Business Unit (either 'srf', 'rtr', 'swi', 'rts', 'rsi')
         """
         params = {"bu": bu}
-        resp = self._get("tv_topics", params=params)
-        return self._handle_response(resp)
+        return self._cached_get("tv_topics", params=params)
 
     @SRGSSRApiClient._renew_access_token
     def get_latest_episodes(
@@ -82,8 +165,7 @@ class SRGSSRVideoApiClient(SRGSSRApiClient):
         elif topic_id:
             url = f"latest_topics/{topic_id}"
 
-        resp = self._get(url, params=params)
-        return self._handle_response(resp)
+        return self._cached_get(url, params=params)
 
     @SRGSSRApiClient._renew_access_token
     def get_trendings(self, bu: str, page_size: int = -1, next_page_id: str = "") -> dict:
@@ -94,8 +176,7 @@ class SRGSSRVideoApiClient(SRGSSRApiClient):
         if next_page_id:
             params.update({"next": next_page_id})
 
-        resp = self._get("trending_picks", params=params)
-        return self._handle_response(resp)
+        return self._cached_get("trending_picks", params=params)
 
     @SRGSSRApiClient._renew_access_token
     def get_most_clicked(
@@ -110,8 +191,7 @@ class SRGSSRVideoApiClient(SRGSSRApiClient):
         if topic_id:
             params.update({"topicId": topic_id})
 
-        resp = self._get("most_clicked", params=params)
-        return self._handle_response(resp)
+        return self._cached_get("most_clicked", params=params)
 
     @SRGSSRApiClient._renew_access_token
     def search_video(
@@ -127,8 +207,7 @@ class SRGSSRVideoApiClient(SRGSSRApiClient):
         if next_page_id:
             params.update({"next": next_page_id})
 
-        resp = self._get("search", params=params)
-        return self._handle_response(resp)
+        return self._cached_get("search", params=params)
 
     @SRGSSRApiClient._renew_access_token
     def get_media_composition(self, bu: str, video_id: str) -> dict:
@@ -138,5 +217,4 @@ class SRGSSRVideoApiClient(SRGSSRApiClient):
         """
         params = {"bu": bu}
 
-        resp = self._get(f"{video_id}/mediaComposition", params=params)
-        return self._handle_response(resp)
+        return self._cached_get(f"{video_id}/mediaComposition", params=params)
@@ -0,0 +1,88 @@
+"""Access token storage shared by the plugin processes"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+class TokenStore:
+    """Access token of an API stored in the addon profile folder
+
+    Kodi may run several plugin processes at once (e.g. widgets). A lock file makes sure only one
+    of them requests a new token while the others wait and then read it.
+    """
+
+    _LOCK_MARGIN = 5  # Seconds a lock is held on top of the token request
+
+    def __init__(self, path: str, logger, request_timeout: float):
+        """
+        :param path: Path of the token file, without extension
+        :param logger: The plugin logger
+        :param request_timeout: Longest duration in seconds of a token request (connect and read
+                                timeouts). The lock is considered abandoned after it
+        """
+        self._token_path = path + ".json"
+        self._lock_path = path + ".lock"
+        self._logger = logger
+        self._lock_timeout = request_timeout + self._LOCK_MARGIN
+
+    def get(self, min_validity: int = 0) -> str:
+        """Returns the stored token if it is valid for at least min_validity seconds, else None"""
+        try:
+            with open(self._token_path, encoding="utf-8") as token_file:
+                data = json.load(token_file)
+        except (OSError, ValueError):
+            return None
+
+        if data.get("expires", 0) - min_validity > time.time():
+            return data.get("token")
+        return None
+
+    def set(self, token: str, expires_in: int):
+        """Stores a token valid for expires_in seconds"""
+        data = {"token": token, "expires": time.time() + expires_in}
+        tmp_path = f"{self._token_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as token_file:
+                json.dump(data, token_file)
+            os.replace(tmp_path, self._token_path)
+        except OSError as exc:
+            self._logger.warning("Unable to store the token: %s", exc)
+
+    @contextmanager
+    def lock(self):
+        """Cross-process lock held while a new token is requested"""
+        deadline = time.time() + self._lock_timeout
+        locked = False
+        while not locked:
+            try:
+                os.close(os.open(self._lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                locked = True
+            except FileExistsError:
+                if self._remove_abandoned_lock():
+                    continue
+                if time.time() > deadline:
+                    self._logger.warning("Token lock timeout, continuing without it")
+                    break
+                time.sleep(0.1)
+
+        try:
+            yield
+        finally:
+            if locked:
+                try:
+                    os.remove(self._lock_path)
+                except OSError:
+                    pass
+
+    def _remove_abandoned_lock(self) -> bool:
+        """Removes the lock file of a process that died holding it. Returns true if removed"""
+        try:
+            if os.path.getmtime(self._lock_path) + self._lock_timeout < time.time():
+                os.remove(self._lock_path)
+                return True
+        except OSError:
+            return True  # The lock has just been released
+        return False
@@ -0,0 +1,5 @@
+from resources.lib.service import CacheWarmer
+
+if __name__ == "__main__":
+    service = CacheWarmer()
+    service.run()